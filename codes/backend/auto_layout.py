@@ -0,0 +1,249 @@
+import argparse
+import functools
+import math
+import os
+import time
+import numpy as np
+from book_store import open_book
+from create_book import STORAGE_PATH
+
+GRID_STEP = 50  # The graph view's grid spacing; locations snap to it.
+SPACING = 400  # Ideal distance between linked pages, in page_location units.
+ITERATIONS = 80
+INCREMENTAL_ITERATIONS = 30
+GRAVITY = 1.0  # Pull towards the centre; keeps unlinked pages from drifting off.
+MIN_GRID = 32  # Cells per side of the repulsion grid, chosen from the page count.
+MAX_GRID = 256
+WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+
+@functools.lru_cache(maxsize=8)
+def repulsion_kernel(size):
+    """
+    Fourier transform of the 2D repulsion field d / |d|^2 on a 2*size grid
+    (in cell units), so one multiplication convolves it with a density grid.
+    """
+    offsets = np.fft.fftfreq(2 * size, 1 / (2 * size))
+    dx, dy = np.meshgrid(offsets, offsets, indexing="ij")
+    r2 = dx * dx + dy * dy
+    r2[0, 0] = np.inf  # No force from a node's own cell here.
+    return np.fft.rfft2(dx / r2), np.fft.rfft2(dy / r2)
+
+
+def repulsion(pos, k):
+    """
+    Repulsive force k^2 / r between all pairs, approximated on a grid.
+
+    Nodes are binned into cells; the field of the cell densities is a single
+    FFT convolution, read back at each node's cell. Nodes sharing a cell are
+    pushed away from the cell's centroid instead, which keeps the cost at
+    O(n + G^2 log G) per step.
+    """
+    n = len(pos)
+    size = int(np.clip(2 ** math.ceil(math.log2(math.sqrt(n) + 1)), MIN_GRID, MAX_GRID))
+    low = pos.min(axis=0)
+    cell = max(float((pos.max(axis=0) - low).max()), k) / (size - 1)
+
+    cells = np.minimum(((pos - low) / cell + 0.5).astype(np.int64), size - 1)
+    flat = cells[:, 0] * (2 * size) + cells[:, 1]  # Index into the padded grid.
+    counts = np.bincount(flat, minlength=4 * size * size)
+    density = np.fft.rfft2(counts.reshape(2 * size, 2 * size).astype(np.float64))
+
+    kernel_x, kernel_y = repulsion_kernel(size)
+    shape = (2 * size, 2 * size)
+    force = np.empty_like(pos)
+    force[:, 0] = np.fft.irfft2(density * kernel_x, s=shape).ravel()[flat]
+    force[:, 1] = np.fft.irfft2(density * kernel_y, s=shape).ravel()[flat]
+    force *= k * k / cell
+
+    # Within a cell: push away from the centroid of the other nodes.
+    centroid = (
+        np.stack(
+            [
+                np.bincount(flat, pos[:, 0], len(counts)),
+                np.bincount(flat, pos[:, 1], len(counts)),
+            ],
+            axis=1,
+        )[flat]
+        / counts[flat, None]
+    )
+    delta = pos - centroid
+    distance2 = np.maximum((delta * delta).sum(axis=1), 1e-3)
+    force += k * k * delta * ((counts[flat] - 1) / distance2)[:, None]
+    return force
+
+
+def attraction(pos, src, dst, k):
+    """
+    Spring force |d|^2 / k along every link, averaged over each node's links
+    so that densely linked pages are not pulled on top of each other.
+    """
+    delta = pos[dst] - pos[src]
+    pull = delta * (np.hypot(delta[:, 0], delta[:, 1]) / k)[:, None]
+    force = np.zeros_like(pos)
+    for axis in (0, 1):
+        force[:, axis] += np.bincount(src, pull[:, axis], len(pos))
+        force[:, axis] -= np.bincount(dst, pull[:, axis], len(pos))
+    degree = np.bincount(src, minlength=len(pos)) + np.bincount(dst, minlength=len(pos))
+    return force / np.maximum(degree, 1)[:, None]
+
+
+def force_layout(
+    pos, src, dst, movable=None, iterations=ITERATIONS, k=SPACING, temperature=None
+):
+    """
+    Fruchterman-Reingold layout of an (n, 2) position array for the links
+    src[i] -> dst[i] (node indices). Only nodes where movable is True move;
+    all nodes exert forces. temperature caps the first step's displacement.
+    Returns the new positions.
+    """
+    pos = np.array(pos, dtype=np.float64)
+    n = len(pos)
+    if n < 2 or iterations <= 0:
+        return pos
+    if movable is None:
+        movable = np.ones(n, dtype=bool)
+
+    # Displacements are capped by a temperature that cools every step.
+    start = k * math.sqrt(movable.sum()) / 4 if temperature is None else temperature
+    end = k / 20
+    for step in range(iterations):
+        temperature = start + (end - start) * step / max(1, iterations - 1)
+        force = repulsion(pos, k) + attraction(pos, src, dst, k)
+        force -= GRAVITY * (pos - pos.mean(axis=0))
+
+        length = np.maximum(np.hypot(force[:, 0], force[:, 1]), 1e-9)
+        step_length = np.minimum(length, temperature)
+        pos[movable] += (force * (step_length / length)[:, None])[movable]
+    return pos
+
+
+def spread(pos, k=SPACING):
+    """
+    Scale a layout about its centre until there is room for a page every k by
+    k. Densely linked books otherwise settle into a ball of overlapping pages.
+    """
+    low, high = np.percentile(pos, [5, 95], axis=0)
+    area = np.prod(np.maximum(high - low, 1))
+    needed = 0.9 * len(pos) * k * k  # 90% of the pages lie in that box.
+    if area < needed:
+        centre = pos.mean(axis=0)
+        pos = centre + (pos - centre) * math.sqrt(needed / area)
+    return pos
+
+
+def snap(pos):
+    """Round positions to the view's grid."""
+    return (np.round(pos / GRID_STEP) * GRID_STEP).astype(np.int64)
+
+
+def stacked_pages(pos):
+    """Mask of pages sharing their location with another page."""
+    _, inverse, counts = np.unique(pos, axis=0, return_inverse=True, return_counts=True)
+    return counts[inverse.ravel()] > 1
+
+
+def layout_book(
+    book_path, incremental=False, page_ids=None, iterations=None, workers=WORKERS
+):
+    """
+    Compute page_location for the pages of a book from its links and save it.
+
+    A full layout starts from random positions and places every page. An
+    incremental one only relaxes new pages (page_ids, or else every page
+    stacked on another one) and their direct neighbours, around the pages
+    that stay put. Returns the number of pages whose location changed.
+    """
+    store = open_book(book_path)
+    pages = list(store.pages())
+    ids = [page["page_id"] for page in pages]
+    number = {page_id: i for i, page_id in enumerate(ids)}
+    old = np.array([(page["x"], page["y"]) for page in pages], dtype=np.float64)
+    old = old.reshape(-1, 2)
+
+    links = np.array(
+        [
+            (number[src], number[dst])
+            for src, dst, _ in store.links()
+            if src in number and dst in number and src != dst
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    src, dst = links[:, 0], links[:, 1]
+    rng = np.random.default_rng(0)
+
+    if incremental:
+        if page_ids is None:
+            new = stacked_pages(old) if len(old) else np.zeros(0, dtype=bool)
+        else:
+            new = np.zeros(len(ids), dtype=bool)
+            new[[number[p] for p in page_ids if p in number]] = True
+        if not new.any():
+            store.close()
+            return 0
+
+        movable = new.copy()
+        movable[dst[new[src]]] = True
+        movable[src[new[dst]]] = True
+
+        # New pages start next to their placed neighbours, or near the centre.
+        pos = old.copy()
+        placed = ~new
+        anchored = np.zeros(len(ids))
+        sums = np.zeros_like(pos)
+        for a, b in ((src, dst), (dst, src)):
+            keep = new[a] & placed[b]
+            np.add.at(sums, a[keep], pos[b[keep]])
+            np.add.at(anchored, a[keep], 1)
+        centre = old[placed].mean(axis=0) if placed.any() else np.zeros(2)
+        pos[new] = np.where(
+            anchored[new, None] > 0,
+            sums[new] / np.maximum(anchored[new], 1)[:, None],
+            centre,
+        ) + rng.normal(0, SPACING / 2, (new.sum(), 2))
+        iterations = INCREMENTAL_ITERATIONS if iterations is None else iterations
+        temperature = 2 * SPACING  # Neighbours only make room locally.
+    else:
+        movable = None
+        radius = SPACING * math.sqrt(len(ids))
+        pos = rng.uniform(-radius, radius, (len(ids), 2))
+        iterations = ITERATIONS if iterations is None else iterations
+        temperature = None
+
+    pos = force_layout(pos, src, dst, movable, iterations, temperature=temperature)
+    pos = snap(pos if incremental else spread(pos))
+    changed = np.flatnonzero((pos != old).any(axis=1))
+    store.update_pages(
+        {
+            ids[i]: {"page_location": {"x": int(pos[i, 0]), "y": int(pos[i, 1])}}
+            for i in changed
+        },
+        workers=workers,
+    )
+    store.close()
+    return len(changed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Lay out the pages of a book from its links."
+    )
+    parser.add_argument("book", help="Book name inside storage/bag/")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only place new (stacked or listed) pages and their neighbours",
+    )
+    parser.add_argument("--pages", nargs="+", help="IDs of the pages to place")
+    parser.add_argument("--iterations", type=int)
+    args = parser.parse_args()
+
+    book_path = STORAGE_PATH / args.book
+    if not book_path.exists():
+        parser.error(f"The book '{args.book}' does not exist.")
+
+    start = time.perf_counter()
+    moved = layout_book(
+        book_path, args.incremental or bool(args.pages), args.pages, args.iterations
+    )
+    print(f"✅ Moved {moved} pages in {time.perf_counter() - start:.2f}s")
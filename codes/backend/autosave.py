@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+JOURNAL_NAME = ".autosave.journal"  # Write-ahead journal, kept in the book folder.
+DEBOUNCE = 0.5  # Seconds without edits before dirty pages are written.
+MAX_DELAY = 5.0  # Under constant editing, pages are still written this often.
+BATCH_SIZE = 256  # Pages written per flush; the rest wait for the next one.
+
+
+class AutoSaver:
+    """
+    Background saving of page edits for an open book (FolderBook or SqliteBook).
+
+    mark() only merges the changed fields into an in-memory dirty set, so a
+    page dragged across the screen or edited key by key is written once, after
+    edits pause for DEBOUNCE seconds (and at least every MAX_DELAY seconds).
+    A writer thread flushes at most BATCH_SIZE pages at a time: the batch is
+    first appended to the book's journal and fsynced, then written through the
+    backend (atomic renames for page files, one transaction for SQLite), then
+    the journal is truncated once the pages are synced to disk. A batch
+    interrupted by a crash is replayed from the journal the next time the book
+    is opened. Pages deleted or broken on disk are dropped from a batch one by
+    one (and counted in skipped); the rest of it is still written.
+    """
+
+    def __init__(
+        self, book, delay=DEBOUNCE, max_delay=MAX_DELAY, batch_size=BATCH_SIZE
+    ):
+        self.book = book
+        self.journal_path = book.book_path / JOURNAL_NAME
+        self.delay = delay
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.dirty = {}  # page_id -> {field: value} not written yet.
+        self.first_change = None  # Monotonic times bounding the pending edits.
+        self.last_change = None
+        self.condition = threading.Condition()
+        self.closing = False
+        self.saved = 0
+        self.skipped = 0
+        self.flushes = 0
+
+        self.recover()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def mark(self, page_id, **fields):
+        """Record changed fields of a page, e.g. page_location or page_content."""
+        with self.condition:
+            self.dirty.setdefault(page_id, {}).update(fields)
+            now = time.monotonic()
+            if self.first_change is None:
+                self.first_change = now
+            self.last_change = now
+            self.condition.notify()
+
+    def is_dirty(self, page_id):
+        with self.condition:
+            return page_id in self.dirty
+
+    def recover(self):
+        """Re-apply batches a crash left in the journal (writes are idempotent)."""
+        try:
+            with self.journal_path.open("r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+
+        for line in lines:
+            try:
+                self.book.update_pages(json.loads(line), sync=True)
+            except (OSError, ValueError, KeyError, sqlite3.Error):
+                continue  # A torn last line: its batch was never applied.
+        if lines:
+            self.truncate_journal()
+
+    def run(self):
+        while True:
+            with self.condition:
+                batch = self.next_batch()
+                if batch is None:
+                    return
+            self.write(batch)
+
+    def next_batch(self):
+        """Wait (holding the condition) until a batch is due; None once closed."""
+        while True:
+            if not self.dirty:
+                if self.closing:
+                    return None
+                self.condition.wait()
+                continue
+
+            now = time.monotonic()
+            due = min(self.last_change + self.delay, self.first_change + self.max_delay)
+            if self.closing or now >= due:
+                break
+            self.condition.wait(due - now)
+
+        page_ids = list(self.dirty)[: self.batch_size]
+        batch = {page_id: self.dirty.pop(page_id) for page_id in page_ids}
+        if self.dirty:
+            # The rest is written one debounce later, which keeps heavy editing
+            # to one batch per interval.
+            self.first_change = self.last_change = time.monotonic()
+        else:
+            self.first_change = self.last_change = None
+        return batch
+
+    def write(self, batch):
+        try:
+            with self.journal_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(batch, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            skipped = self.book.update_pages(batch, sync=True)
+            self.truncate_journal()
+        except (OSError, sqlite3.Error):
+            # Full disks, locked files and "database is locked" pass; the
+            # thread must survive them to write every later edit.
+            if self.closing:
+                return  # Whatever reached the journal is replayed on reopening.
+
+            # Keep the changes (under any newer ones) and retry later.
+            with self.condition:
+                for page_id, fields in batch.items():
+                    self.dirty[page_id] = {**fields, **self.dirty.get(page_id, {})}
+                now = time.monotonic()
+                self.first_change = self.first_change or now
+                self.last_change = now
+            time.sleep(self.delay)
+            return
+
+        self.saved += len(batch) - len(skipped)
+        self.skipped += len(skipped)
+        self.flushes += 1
+
+    def truncate_journal(self):
+        # Truncated rather than deleted, so saving does not touch the folder.
+        with self.journal_path.open("w", encoding="utf-8"):
+            pass
+
+    def close(self):
+        """Write everything still dirty and stop the writer thread."""
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.thread.join()
@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from create_book import STORAGE_PATH
+from manifest import CACHE_PATH
+from sqlite_book import SQLITE_NAME
+
+CATALOG_VERSION = 1
+CATALOG_PATH = CACHE_PATH / "catalog.json"
+# Files whose mtime says a book changed without its folder changing.
+WATCHED_FILES = ("links.csv", SQLITE_NAME, f"{SQLITE_NAME}-wal")
+
+
+def book_signature(book_path):
+    """Newest mtime (ns) of a book folder and the files it is written through."""
+    newest = book_path.stat().st_mtime_ns
+    for name in WATCHED_FILES:
+        try:
+            newest = max(newest, (book_path / name).stat().st_mtime_ns)
+        except OSError:
+            continue
+    return newest
+
+
+def count_pages(book_path):
+    """Number of pages, without reading any of them."""
+    db_path = book_path / SQLITE_NAME
+    if db_path.exists():
+        db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        finally:
+            db.close()
+
+    with os.scandir(book_path) as it:
+        return sum(1 for item in it if item.name.endswith(".json") and item.is_file())
+
+
+class BookCatalog:
+    """
+    The books in storage/bag/ with their page counts and last-modified times.
+
+    Stored in storage/cache/catalog.json so the start window can list books
+    without touching their folders. refresh() rescans the bag and only counts
+    the pages of books whose folder or link/SQLite files changed since the
+    last refresh.
+    """
+
+    def __init__(self, bag_path=STORAGE_PATH, path=CATALOG_PATH):
+        self.bag_path = bag_path
+        self.path = path
+        self.books = {}  # name -> {"pages", "modified" (ns), "backend"}.
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.books)
+
+    def names(self):
+        with self.lock:
+            return sorted(self.books)
+
+    def get(self, name):
+        with self.lock:
+            return self.books.get(name)
+
+    def load(self):
+        """Read the saved catalog; returns False if it is missing or outdated."""
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if stored.get("version") != CATALOG_VERSION:
+            return False
+
+        with self.lock:
+            self.books = stored["books"]
+        return True
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with self.lock:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump({"version": CATALOG_VERSION, "books": self.books}, f)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self):
+        """Rescan the bag; returns True (and saves) if any book changed."""
+        books = {}
+        with os.scandir(self.bag_path) as it:
+            for item in it:
+                if not item.is_dir():
+                    continue
+                book_path = self.bag_path / item.name
+                try:
+                    modified = book_signature(book_path)
+                    entry = self.books.get(item.name)
+                    if entry is None or entry["modified"] != modified:
+                        entry = {
+                            "pages": count_pages(book_path),
+                            "modified": modified,
+                            "backend": (
+                                "sqlite"
+                                if (book_path / SQLITE_NAME).exists()
+                                else "folder"
+                            ),
+                        }
+                except (OSError, sqlite3.Error):
+                    continue  # Deleted mid-scan or unreadable; listed next time.
+                books[item.name] = entry
+
+        if books == self.books:
+            return False
+        with self.lock:
+            self.books = books
+        self.save()
+        return True
+
+
+if __name__ == "__main__":
+    import datetime
+
+    parser = argparse.ArgumentParser(description="List the books in storage/bag/.")
+    parser.parse_args()
+
+    catalog = BookCatalog()
+    catalog.load()
+    catalog.refresh()
+    for name in catalog.names():
+        entry = catalog.get(name)
+        modified = datetime.datetime.fromtimestamp(entry["modified"] / 1e9)
+        print(
+            f"{name:30} {entry['pages']:8d} pages  {entry['backend']:6}"
+            f"  {modified:%Y-%m-%d %H:%M}"
+        )
@@ -0,0 +1,191 @@
+import json
+import os
+import pathlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import tracer
+from link_store import LinkStore
+from manifest import open_manifest
+from page_style import StyleTable
+from sqlite_book import SQLITE_NAME, SqliteBook
+
+PAGE_VERSION = 1  # Page file schema version; fsck_books.py upgrades older files.
+
+
+def sanitize_title(title):
+    """Replace any characters that aren't allowed in filenames with underscores."""
+    return re.sub(r'[\\/*?:"<>|]', "_", title)
+
+
+def write_json_atomic(path, data, sync=False):
+    """
+    Serialize data to path via a temporary file, so readers never see half a
+    page. With sync, the data is on disk before the file is swapped in.
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as file:
+        json.dump(data, file, indent=4, ensure_ascii=False)
+        if sync:
+            file.flush()
+            os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def fsync_dir(path):
+    """Make renames in a directory durable (Windows can't open directories)."""
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class FolderBook:
+    """
+    A book stored as storage/bag/<book>/ with one JSON file per page and a
+    links.csv journal. Shares its interface with SqliteBook.
+    """
+
+    backend = "folder"
+
+    def __init__(self, book_path):
+        self.book_path = pathlib.Path(book_path)
+        self.files = {}  # page_id -> page file, filled in by pages().
+        self.link_store = None
+        self.styles = StyleTable.load(self.book_path)
+
+    def close(self):
+        pass
+
+    def pages(self, deep=False):
+        """
+        Yield one entry per page from the manifest, without opening page files.
+        With deep, every file's stat is checked for edits made in place.
+        """
+        for page in open_manifest(self.book_path, deep).pages():
+            self.files[page["page_id"]] = page["file"]
+            page["name"] = page["file"].stem
+            yield page
+
+    def index_files(self):
+        """Re-list the page files from the manifest, dropping deleted pages."""
+        self.files = {
+            page["page_id"]: page["file"]
+            for page in open_manifest(self.book_path).pages()
+        }
+
+    def read_page(self, page_id):
+        """Full page data, as stored in the page's JSON file."""
+        if page_id not in self.files:
+            for _ in self.pages():
+                pass
+        with tracer.timer("page.parse"):
+            with self.files[page_id].open("r", encoding="utf-8") as file:
+                return json.load(file)
+
+    def write_pages(self, pages, workers=1, sync=False):
+        """
+        Write (name, data) pairs as <name>.json and record them in the manifest.
+        Styles matching a named style are stored by name. With workers > 1 the
+        files are written by a thread pool. With sync, the pages are on disk
+        when this returns.
+        """
+        self.book_path.mkdir(parents=True, exist_ok=True)
+        manifest = open_manifest(self.book_path)
+        writes = [
+            (
+                self.book_path / f"{name}.json",
+                dict(
+                    data,
+                    page_style=self.styles.reference(data.get("page_style")),
+                    page_version=PAGE_VERSION,
+                ),
+            )
+            for name, data in pages
+        ]
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(
+                    executor.map(
+                        lambda write: write_json_atomic(*write, sync=sync), writes
+                    )
+                )
+        else:
+            for page_path, data in writes:
+                write_json_atomic(page_path, data, sync)
+        if sync and writes:
+            fsync_dir(self.book_path)
+
+        for page_path, data in writes:
+            manifest.record_page(page_path, data)
+            self.files[data["page_id"]] = page_path
+        manifest.adopt_writes()
+        manifest.save()
+
+    def update_pages(self, updates, workers=1, sync=False):
+        """
+        Merge {page_id: {field: value}} into the stored pages and write them
+        back. Pages that were deleted or can't be parsed are skipped one by
+        one; returns their IDs.
+        """
+        if any(page_id not in self.files for page_id in updates):
+            self.index_files()
+
+        pages = []
+        skipped = []
+        for page_id, fields in updates.items():
+            data = self.read_existing(page_id)
+            if data is None:
+                skipped.append(page_id)
+                continue
+            data.update(fields)
+            pages.append((self.files[page_id].stem, data))
+        self.write_pages(pages, workers, sync)
+        return skipped
+
+    def read_existing(self, page_id):
+        """A page's data, or None if it is gone or malformed."""
+        for _ in range(2):
+            try:
+                data = self.read_page(page_id)
+            except FileNotFoundError:
+                self.index_files()  # Deleted or renamed since files was filled.
+                continue
+            except (OSError, KeyError, ValueError):
+                return None
+            return data if isinstance(data, dict) else None
+        return None
+
+    def links_journal(self):
+        if self.link_store is None:
+            self.link_store = LinkStore(self.book_path)
+        return self.link_store
+
+    def add_link(self, src, dst, style="default"):
+        """Add a link; returns its ID, or None if it already exists."""
+        return self.links_journal().add(src, dst, style)
+
+    def add_links(self, links):
+        for src, dst, style in links:
+            self.add_link(src, dst, style)
+
+    def release_links(self):
+        """Free the in-memory link index; it is replayed again when needed."""
+        self.link_store = None
+
+    def links(self):
+        """Yield every link as (src, dst, style)."""
+        store = self.links_journal()
+        store.sync()  # Pick up links other processes appended.
+        yield from list(store.links.values())
+
+
+def open_book(book_path):
+    """Open a book with whichever backend it is stored in."""
+    book_path = pathlib.Path(book_path)
+    if (book_path / SQLITE_NAME).exists():
+        return SqliteBook(book_path)
+    return FolderBook(book_path)
@@ -0,0 +1,113 @@
+import argparse
+import os
+import pathlib
+import time
+from book_store import open_book, sanitize_title
+from create_book import STORAGE_PATH, create_book
+from create_check_id import reserve_ids
+from page_style import get_page_style
+
+BATCH_SIZE = 1000  # Pages per id reservation and write batch.
+WORKERS = min(8, (os.cpu_count() or 1) * 2)  # File writes are I/O bound.
+COLUMNS = 100  # Imported pages are laid out row by row on the grid.
+COLUMN_SPACING = 300
+ROW_SPACING = 250
+
+
+def iter_markdown(source_dir):
+    """Yield every Markdown file under source_dir, in a stable order."""
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith((".md", ".markdown")):
+                yield pathlib.Path(root) / name
+
+
+def grid_location(index):
+    return {
+        "x": (index % COLUMNS) * COLUMN_SPACING,
+        "y": -(index // COLUMNS) * ROW_SPACING,
+    }
+
+
+def import_markdown(book_path, source_dir, workers=WORKERS, batch_size=BATCH_SIZE):
+    """
+    Stream a directory of Markdown files into pages of a book.
+
+    Files are read batch by batch, ids are reserved once per batch and pages are
+    written through the book's backend (in parallel, atomically, for page
+    folders). Returns (pages imported, elapsed seconds).
+    """
+    book_path = pathlib.Path(book_path)
+    if not book_path.exists():
+        create_book(book_path)
+
+    store = open_book(book_path)
+    existing = list(store.pages())
+    names = {page["name"] for page in existing}
+    style = get_page_style()
+
+    imported = 0
+    start = time.perf_counter()
+    batch = []
+
+    def flush():
+        nonlocal imported
+        for page_id, (_, data) in zip(reserve_ids(len(batch)), batch):
+            data["page_id"] = page_id
+        store.write_pages(batch, workers=workers)
+        imported += len(batch)
+        batch.clear()
+
+        elapsed = time.perf_counter() - start
+        print(f"{imported} pages, {imported / elapsed:.0f} pages/s", flush=True)
+
+    for path in iter_markdown(source_dir):
+        title = path.stem
+        name = sanitize_title(title)
+        if name in names:
+            # Same title elsewhere in the tree; keep both pages.
+            suffix = 2
+            while f"{name}_{suffix}" in names:
+                suffix += 1
+            name = f"{name}_{suffix}"
+        names.add(name)
+
+        batch.append(
+            (
+                name,
+                {
+                    "page_title": title,
+                    "page_id": None,  # Filled in from the batch reservation.
+                    "page_content": path.read_text(encoding="utf-8", errors="replace"),
+                    "page_location": grid_location(
+                        len(existing) + imported + len(batch)
+                    ),
+                    "page_style": style,
+                },
+            )
+        )
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    store.close()
+    return imported, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Import a directory of Markdown files as pages of a book."
+    )
+    parser.add_argument("book", help="Book name inside storage/bag/")
+    parser.add_argument("source", help="Directory to scan for .md files")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    count, elapsed = import_markdown(
+        STORAGE_PATH / args.book, args.source, args.workers, args.batch_size
+    )
+    rate = count / elapsed if elapsed else 0
+    print(f"✅ Imported {count} pages in {elapsed:.2f}s ({rate:.0f} pages/s)")
@@ -1,31 +1,115 @@
+import contextlib
+import os
 import pathlib
 import random
 import string
 
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
 
-def check_id(page_id):
-    """Check if a given page ID already exists in ids.csv (to avoid duplicates)."""
-    ids_file = pathlib.Path("../../storage/data/ids.csv")  # Path to the IDs list.
+IDS_PATH = pathlib.Path("../../storage/data/ids.csv")  # Path to the IDs list.
+ID_LENGTH = 6
+ID_CHARACTERS = string.ascii_lowercase + string.digits  # Allowed characters.
+
+
+@contextlib.contextmanager
+def locked(lock_path):
+    """Hold an exclusive, cross-process lock on lock_path for the block."""
+    with lock_path.open("a+b") as lock_file:
+        if os.name == "nt":
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class IdAllocator:
+    """
+    Hands out unique page IDs in O(1).
+
+    ids.csv stays an append-only log with one ID per line. The allocator keeps
+    every ID it has seen in memory and only reads the part of the file that
+    other processes appended since its last look. Reservations happen under an
+    exclusive lock file, so concurrent processes never issue the same ID.
+    """
+
+    def __init__(self, ids_path=IDS_PATH):
+        self.ids_path = ids_path
+        self.lock_path = ids_path.with_suffix(".lock")
+        self.ids = set()
+        self.offset = 0  # Bytes of ids.csv already loaded into self.ids.
+        self.inode = None  # Identity of the ids.csv that was loaded.
+
+    def sync(self):
+        """Load IDs appended to ids.csv since the last sync."""
+        self.ids_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ids_path.touch(exist_ok=True)  # Ensure the file exists before reading.
+
+        # fsck_books.py rebuilds ids.csv by replacing it; start over then.
+        stat = self.ids_path.stat()
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.ids.clear()
+            self.offset = 0
+            self.inode = stat.st_ino
+
+        with self.ids_path.open("rb") as file:
+            file.seek(self.offset)
+            data = file.read()
+
+        # Another process may be mid-append; leave a partial last line for later.
+        end = data.rfind(b"\n") + 1
+        self.ids.update(line.strip() for line in data[:end].decode("utf-8").split())
+        self.offset += end
 
-    ids_file.touch(exist_ok=True)  # Ensure the file exists before reading.
+    def __contains__(self, page_id):
+        self.sync()
+        return page_id in self.ids
 
-    # Read all IDs from the file and check if the given ID is already in there.
-    with ids_file.open("r", encoding="utf-8") as file:
-        return page_id in {line.strip() for line in file}
+    def reserve(self, count=1):
+        """Reserve count new IDs in one locked append and return them."""
+        self.ids_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with locked(self.lock_path):
+            self.sync()  # Pick up IDs issued by other processes first.
+
+            new_ids = []
+            while len(new_ids) < count:
+                new_id = "".join(random.choices(ID_CHARACTERS, k=ID_LENGTH))
+                if new_id not in self.ids:  # Ensure the ID is unique.
+                    self.ids.add(new_id)
+                    new_ids.append(new_id)
+
+            data = "".join(f"{new_id}\n" for new_id in new_ids).encode("utf-8")
+            with self.ids_path.open("ab") as file:
+                file.write(data)  # Save the new IDs to the file.
+            self.offset += len(data)
+
+        return new_ids
+
+
+allocator = IdAllocator()
+
+
+def check_id(page_id):
+    """Check if a given page ID already exists in ids.csv (to avoid duplicates)."""
+    return page_id in allocator
 
 
 def create_id():
     """Generate a unique 6-character alphanumeric ID for the page."""
-    characters = string.ascii_lowercase + string.digits  # Allowed characters in the ID.
-
-    while True:
-        new_id = "".join(
-            random.choices(characters, k=6)
-        )  # Generate a random 6-char ID.
-
-        if not check_id(new_id):  # Ensure the ID is unique before using it.
-            with pathlib.Path("../../storage/data/ids.csv").open(
-                "a", encoding="utf-8"
-            ) as file:
-                file.write(new_id + "\n")  # Save the new ID to the file.
-            return new_id  # Return the generated unique ID.
+    return allocator.reserve(1)[0]
+
+
+def reserve_ids(count):
+    """Reserve a batch of unique IDs at once, e.g. for bulk imports."""
+    return allocator.reserve(count)
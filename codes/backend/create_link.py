@@ -1,5 +1,5 @@
-import json
 import pathlib
+from book_store import open_book
 
 # Prompt the user for a book name and construct its path
 book = input("Book name:\n")  # Get user input for the book name
@@ -21,10 +21,14 @@ if not book_path.exists():
         print("Operation cancelled. No book created.")
         exit(1)  # Exit if the user does not want to create the book
 
+# Open the book with whichever backend (page folder or SQLite) it uses
+store = open_book(book_path)
+
 # Retrieve the list of available pages in the book
-files = [
-    f.stem for f in book_path.iterdir() if f.is_file()
-]  # Get all file names (without extensions) in the book directory
+pages = {
+    page["name"]: page for page in store.pages()
+}  # Map every page name (file name without extension) to its entry
+files = list(pages)
 
 # If no pages exist, inform the user; otherwise, display available pages
 if not files:
@@ -52,47 +56,28 @@ while True:
 
     break  # Exit the loop once both valid pages are selected
 
-# Construct full file paths for the selected pages
-page1_path = book_path / f"{page1_name}.json"
-page2_path = book_path / f"{page2_name}.json"
-
-# Ensure that the selected page files actually exist before proceeding
-if not page1_path.exists() or not page2_path.exists():
+# Load the data of the selected pages
+try:
+    page1_data = store.read_page(pages[page1_name]["page_id"])  # Data for page 1
+    page2_data = store.read_page(pages[page2_name]["page_id"])  # Data for page 2
+except (OSError, KeyError):
     print("Error: One or both pages do not exist.")
-    exit(1)  # Exit the program if any selected page file is missing
-
-# Load the content of the selected JSON page files
-with open(page1_path, "r", encoding="utf-8") as file:
-    page1_data = json.load(file)  # Read and parse JSON data for page 1
-
-with open(page2_path, "r", encoding="utf-8") as file:
-    page2_data = json.load(file)  # Read and parse JSON data for page 2
+    exit(1)  # Exit the program if any selected page is missing
 
 
 # Function to create a link between two pages
 def create_link_with_name(page1_data, page2_data, link_style="default"):
     """
-    Creates a unique link between two pages and stores it in links.csv.
+    Creates a unique link between two pages and stores it in the book.
     If the link already exists, it does not add a duplicate.
     """
-    # Construct a unique link ID using both page IDs and the link style
-    link_id = f"{page1_data['page_id']}-{page2_data['page_id']}-{link_style}"
-    links_file = book_path / "links.csv"  # Define the path to links.csv
-
-    # Check if links.csv exists and read existing links
-    if links_file.exists():
-        with open(links_file, "r", encoding="utf-8") as file:
-            existing_links = {
-                line.strip() for line in file
-            }  # Load existing links into a set for fast lookup
-
-        if link_id in existing_links:  # Check if the link already exists
-            print("Link already exists")
-            return  # Exit the function without writing a duplicate
-
-    # Append the new link to links.csv
-    with open(links_file, "a", encoding="utf-8") as file:
-        file.write(f"{link_id}\n")  # Write the new link ID to the file
+    # The store keeps the book's links indexed, so the duplicate check is a
+    # lookup instead of a reread of links.csv.
+    link_id = store.add_link(page1_data["page_id"], page2_data["page_id"], link_style)
+
+    if link_id is None:  # Check if the link already exists
+        print("Link already exists")
+        return  # Exit the function without writing a duplicate
 
     print(f"Link {link_id} created")  # Confirm link creation
 
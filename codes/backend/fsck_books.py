@@ -0,0 +1,392 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from book_store import PAGE_VERSION, open_book, write_json_atomic
+from create_book import STORAGE_PATH
+from create_check_id import IDS_PATH, IdAllocator, locked
+from link_store import LinkStore
+from manifest import CACHE_PATH, open_manifest
+from page_style import DEFAULT_STYLE, StyleTable
+from sqlite_book import SQLITE_NAME
+
+FSCK_VERSION = 1  # Bump to recheck every book after changing the rules below.
+STATE_PATH = CACHE_PATH / "fsck.json"
+WORKERS = os.cpu_count() or 1
+CHUNK_SIZE = 500  # Page files per task handed to a worker process.
+MAX_DECODE = 4  # Layers of JSON string encoding undone in page content.
+PAGE_KEYS = (
+    "page_title",
+    "page_id",
+    "page_content",
+    "page_location",
+    "page_style",
+    "page_version",
+)
+UNFIXABLE = {"unreadable"}  # Problems a fix run reports but leaves in place.
+
+
+def decode_content(content):
+    """Page content as one Markdown string, undoing repeated JSON encoding."""
+    for _ in range(MAX_DECODE):
+        if not isinstance(content, str) or content.lstrip()[:1] != '"':
+            break
+        try:
+            decoded = json.loads(content)
+        except ValueError:
+            break
+        if not isinstance(decoded, str):
+            break
+        content = decoded
+
+    if content is None:
+        return ""
+    if not isinstance(content, str):
+        return json.dumps(content, ensure_ascii=False)
+    return content
+
+
+def coordinate(value):
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def valid_id(page_id):
+    # Link IDs are "src-dst-style", so a page ID must not contain "-".
+    return isinstance(page_id, str) and page_id != "" and "-" not in page_id
+
+
+def normalize_page(data, name, styles):
+    """
+    Canonical form of a page: the known fields in a fixed order and shape,
+    then any others. Returns (page, problems). An invalid page_id is set to
+    None for the caller to replace.
+    """
+    problems = []
+    content = decode_content(data.get("page_content"))
+    if content != data.get("page_content"):
+        problems.append("content encoding")
+
+    title = data.get("page_title")
+    if not isinstance(title, str):
+        title = name if title is None else str(title)
+        problems.append("title")
+
+    page_id = data.get("page_id")
+    if not valid_id(page_id):
+        page_id = None
+        problems.append("page id")
+
+    location = data.get("page_location")
+    if not isinstance(location, dict):
+        location = {}
+    location = {
+        "x": coordinate(location.get("x", 0)),
+        "y": coordinate(location.get("y", 0)),
+    }
+    if location != data.get("page_location"):
+        problems.append("location")
+
+    style = data.get("page_style")
+    if not isinstance(style, (str, dict)):
+        style = DEFAULT_STYLE
+    style = styles.reference(style)
+
+    page = {
+        "page_title": title,
+        "page_id": page_id,
+        "page_content": content,
+        "page_location": location,
+        "page_style": style,
+        "page_version": PAGE_VERSION,
+    }
+    page.update((key, value) for key, value in data.items() if key not in PAGE_KEYS)
+    if not problems and list(page.items()) != list(data.items()):
+        problems.append("schema")
+    return page, problems
+
+
+def check_page_files(book_path, names, fix):
+    """
+    Worker task: normalize some page files of a folder book. Returns a list
+    of (name, page_id, problems); unreadable files get page_id None.
+    """
+    styles = StyleTable.load(book_path)
+    results = []
+    for name in names:
+        path = book_path / f"{name}.json"
+        try:
+            with path.open("r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            results.append((name, None, ["unreadable"]))
+            continue
+        if not isinstance(data, dict):
+            results.append((name, None, ["unreadable"]))
+            continue
+
+        page, problems = normalize_page(data, name, styles)
+        if problems and fix and page["page_id"] is not None:
+            write_json_atomic(path, page)
+        results.append((name, page["page_id"], problems))
+    return results
+
+
+def check_sqlite_book(book_path, fix):
+    """
+    Worker task: canonicalize content and drop dangling links in a SQLite
+    book. The table schema is already the canonical one. Returns
+    (page_ids, pages fixed, links removed).
+    """
+    db = sqlite3.connect(book_path / SQLITE_NAME)
+    try:
+        rows = db.execute("SELECT page_id, content FROM pages").fetchall()
+        updates = [
+            (decode_content(content), page_id)
+            for page_id, content in rows
+            if decode_content(content) != content
+        ]
+        dangling = db.execute(
+            "SELECT COUNT(*) FROM links WHERE src NOT IN (SELECT page_id FROM pages)"
+            " OR dst NOT IN (SELECT page_id FROM pages)"
+        ).fetchone()[0]
+        if fix and (updates or dangling):
+            with db:
+                db.executemany(
+                    "UPDATE pages SET content = ? WHERE page_id = ?", updates
+                )
+                db.execute(
+                    "DELETE FROM links WHERE src NOT IN (SELECT page_id FROM pages)"
+                    " OR dst NOT IN (SELECT page_id FROM pages)"
+                )
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        db.close()
+    return [page_id for page_id, _ in rows], len(updates), dangling
+
+
+def book_fingerprint(book_path):
+    """
+    Digest of the name, mtime and size of every file in a book folder. A page
+    rewritten in place changes it, though not the folder's own mtime.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with os.scandir(book_path) as it:
+        for item in sorted(it, key=lambda item: item.name):
+            if item.is_file():
+                stat = item.stat()
+                digest.update(
+                    f"{item.name}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode()
+                )
+    return digest.hexdigest()
+
+
+def page_names(book_path):
+    with os.scandir(book_path) as it:
+        return sorted(
+            item.name[: -len(".json")]
+            for item in it
+            if item.name.endswith(".json") and item.is_file()
+        )
+
+
+def resolve_folder_book(book_path, pages, fix, allocator):
+    """
+    Book-wide fixes after the per-page pass: new IDs for pages without a
+    valid or unique one, distinct file names for names that differ only in
+    case, and a links.csv without dangling or duplicate links. Returns
+    (page_ids, report).
+    """
+    report = {}
+    seen = {}
+    renamed = set()
+    for name, page_id, problems in pages:
+        for problem in problems:
+            report[problem] = report.get(problem, 0) + 1
+        if "unreadable" in problems:
+            continue
+
+        path = book_path / f"{name}.json"
+        if page_id is None or page_id in seen:
+            if page_id is not None:
+                report["duplicate id"] = report.get("duplicate id", 0) + 1
+            if not fix:
+                continue
+            with path.open("r", encoding="utf-8") as file:
+                data = json.load(file)
+            page, _ = normalize_page(data, name, StyleTable.load(book_path))
+            page_id = page["page_id"] = allocator.reserve(1)[0]
+            write_json_atomic(path, page)
+        seen[page_id] = name
+
+        # Names equal but for case collide on case-insensitive file systems.
+        key = name.lower()
+        if key in renamed:
+            report["file name collision"] = report.get("file name collision", 0) + 1
+            if fix:
+                target = book_path / f"{name}_{page_id}.json"
+                os.replace(path, target)
+                key = target.stem.lower()
+        renamed.add(key)
+
+    store = LinkStore(book_path)
+    with locked(store.lock_path):
+        store.sync()
+        dangling = [
+            link_id
+            for link_id, (src, dst, _) in store.links.items()
+            if src not in seen or dst not in seen
+        ]
+        duplicates = store.journal_lines - len(store.links)
+        if dangling:
+            report["dangling links"] = len(dangling)
+        if duplicates:
+            report["duplicate or removed link lines"] = duplicates
+        if fix and (dangling or duplicates):
+            for link_id in dangling:
+                store.forget(link_id)
+            store.compact()
+
+    if fix:
+        open_manifest(book_path, deep=True)  # Saved, as pages were rewritten.
+    return list(seen), report
+
+
+def rebuild_ids(ids_path, page_ids):
+    """Rewrite ids.csv as exactly the IDs of existing pages."""
+    ids_path.parent.mkdir(parents=True, exist_ok=True)
+    with locked(ids_path.with_suffix(".lock")):
+        tmp_path = ids_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as file:
+            file.writelines(f"{page_id}\n" for page_id in sorted(page_ids))
+        os.replace(tmp_path, ids_path)
+
+
+def load_state(state_path):
+    try:
+        with state_path.open("r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state.get("books", {}) if state.get("version") == FSCK_VERSION else {}
+
+
+def save_state(state_path, books):
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_suffix(".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump({"version": FSCK_VERSION, "books": books}, f)
+    os.replace(tmp_path, state_path)
+
+
+def fsck_storage(
+    bag_path=STORAGE_PATH,
+    ids_path=IDS_PATH,
+    books=None,
+    fix=True,
+    full=False,
+    workers=WORKERS,
+    state_path=STATE_PATH,
+):
+    """
+    Check (and with fix, repair) the books in bag_path, or only the named
+    ones. Page files are normalized in a process pool; books whose files are
+    unchanged since a pass left them clean are skipped unless full. ids.csv is rebuilt only
+    when every book was looked at. Returns {book: {problem: count}}.
+    """
+    names = books or sorted(item.name for item in os.scandir(bag_path) if item.is_dir())
+    state = {} if full else load_state(state_path)
+    allocator = IdAllocator(ids_path)
+    all_ids = set()
+    reports = {}
+
+    pending = []
+    for name in names:
+        book_path = bag_path / name
+        if state.get(name) == book_fingerprint(book_path):
+            book = open_book(book_path)  # Unchanged: only its IDs are needed.
+            all_ids.update(page["page_id"] for page in book.pages())
+            book.close()
+        else:
+            pending.append(name)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tasks = {}
+        for name in pending:
+            book_path = bag_path / name
+            if (book_path / SQLITE_NAME).exists():
+                tasks[name] = [executor.submit(check_sqlite_book, book_path, fix)]
+                continue
+            files = page_names(book_path)
+            tasks[name] = [
+                executor.submit(
+                    check_page_files, book_path, files[i : i + CHUNK_SIZE], fix
+                )
+                for i in range(0, len(files), CHUNK_SIZE)
+            ]
+
+        for name in pending:
+            book_path = bag_path / name
+            if (book_path / SQLITE_NAME).exists():
+                page_ids, fixed, dangling = tasks[name][0].result()
+                report = {}
+                if fixed:
+                    report["content encoding"] = fixed
+                if dangling:
+                    report["dangling links"] = dangling
+            else:
+                pages = [page for task in tasks[name] for page in task.result()]
+                page_ids, report = resolve_folder_book(book_path, pages, fix, allocator)
+
+            all_ids.update(page_ids)
+            reports[name] = report
+            remaining = report.keys() if not fix else report.keys() & UNFIXABLE
+            if not remaining:
+                state[name] = book_fingerprint(book_path)
+                save_state(state_path, state)  # An interrupted run resumes here.
+
+    if fix and books is None:
+        rebuild_ids(ids_path, all_ids)
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check and normalize the books in storage/bag/."
+    )
+    parser.add_argument("books", nargs="*", help="Only these books (default: all)")
+    parser.add_argument(
+        "--check", action="store_true", help="Only report problems, change nothing"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Also recheck books unchanged since the last run",
+    )
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    reports = fsck_storage(
+        books=args.books or None,
+        fix=not args.check,
+        full=args.full,
+        workers=args.workers,
+    )
+    for name, report in reports.items():
+        summary = ", ".join(f"{count} {problem}" for problem, count in report.items())
+        print(f"{name}: {summary or 'ok'}")
+
+    problems = sum(1 for report in reports.values() if report)
+    elapsed = time.perf_counter() - start
+    if args.check:
+        print(
+            f"{problems} of {len(reports)} checked books need fixing ({elapsed:.1f}s)"
+        )
+        raise SystemExit(1 if problems else 0)
+    print(f"✅ Checked {len(reports)} books, fixed {problems} ({elapsed:.1f}s)")
@@ -0,0 +1,199 @@
+import argparse
+import collections
+import json
+import os
+import pathlib
+import threading
+import time
+
+TRACE_ENV = "NEURONOTE_TRACE"  # Set to 1 to record from startup.
+TRACE_PATH = pathlib.Path("../../storage/cache/traces/")
+MAX_EVENTS = 200_000  # Spans kept for the trace file; older ones are dropped.
+FRAME_WINDOW = 240  # Frames the overlay's percentiles are taken over.
+
+
+class NullTimer:
+    """What timer() returns while recording is off: a shared, empty block."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class Timer:
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class Tracer:
+    """
+    Opt-in named timers and counters for the hot paths.
+
+    Call sites wrap work in `with tracer.timer("name"):` and bump counters
+    with tracer.count(). While disabled, timer() hands back one shared no-op
+    block and count() returns at once, so instrumented code costs a method
+    call. While enabled, every span is aggregated per name (calls, total,
+    max) and kept as an event for export() to write as a Chrome trace file,
+    which chrome://tracing and Perfetto open. Frame times are kept apart for
+    the graph view's overlay. Safe to use from the loader's worker threads.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.origin = time.perf_counter()  # Time zero of the trace.
+            self.totals = {}  # name -> [calls, total seconds, max seconds].
+            self.counters = collections.Counter()
+            self.events = collections.deque(maxlen=MAX_EVENTS)
+            self.frames = collections.deque(maxlen=FRAME_WINDOW)  # (end, seconds).
+
+    def enable(self):
+        if not self.enabled:
+            self.reset()
+            self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def timer(self, name):
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, name)
+
+    def add(self, name, start, seconds):
+        """Record a span that began at perf_counter() time start."""
+        if not self.enabled:
+            return
+        thread = threading.get_ident()
+        with self.lock:
+            total = self.totals.get(name)
+            if total is None:
+                total = self.totals[name] = [0, 0.0, 0.0]
+            total[0] += 1
+            total[1] += seconds
+            total[2] = max(total[2], seconds)
+            self.events.append((name, thread, start, seconds))
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[name] += amount
+
+    def frame(self, start, seconds):
+        """Record one painted frame (also kept as a paintEvent span)."""
+        self.add("paintEvent", start, seconds)
+        with self.lock:
+            self.frames.append((start + seconds, seconds))
+
+    def frame_stats(self):
+        """(frames per second, p50 ms, p99 ms) over the recent frames."""
+        with self.lock:
+            frames = list(self.frames)
+        if not frames:
+            return 0.0, 0.0, 0.0
+
+        now = time.perf_counter()
+        fps = sum(1 for end, _ in frames if now - end <= 1.0)
+        durations = sorted(seconds for _, seconds in frames)
+        p50 = durations[len(durations) // 2]
+        p99 = durations[min(len(durations) - 1, int(len(durations) * 0.99))]
+        return float(fps), 1000 * p50, 1000 * p99
+
+    def summary(self):
+        """{name: {calls, total_ms, mean_ms, max_ms}}, slowest total first."""
+        with self.lock:
+            totals = sorted(self.totals.items(), key=lambda item: -item[1][1])
+        return {
+            name: {
+                "calls": calls,
+                "total_ms": 1000 * total,
+                "mean_ms": 1000 * total / calls,
+                "max_ms": 1000 * longest,
+            }
+            for name, (calls, total, longest) in totals
+        }
+
+    def export(self, path=None, label="session", metadata=None):
+        """
+        Write the recorded spans as a Chrome trace file and return its path,
+        or None if nothing was recorded. By default the file goes to
+        storage/cache/traces/<label>-<time>.json.
+        """
+        with self.lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+            origin = self.origin
+        if not events and not counters:
+            return None
+
+        if path is None:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = TRACE_PATH / f"{label}-{stamp}.json"
+        path = pathlib.Path(path)
+        pid = os.getpid()
+        trace = {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": round((start - origin) * 1e6, 1),
+                    "dur": round(seconds * 1e6, 1),
+                    "pid": pid,
+                    "tid": thread,
+                }
+                for name, thread, start, seconds in events
+            ],
+            "displayTimeUnit": "ms",
+            "otherData": {
+                **(metadata or {}),
+                "summary": self.summary(),
+                "counters": counters,
+            },
+        }
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        os.replace(tmp_path, path)
+        return path
+
+
+tracer = Tracer(os.environ.get(TRACE_ENV) == "1")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a saved trace file.")
+    parser.add_argument("trace", help="Trace file written by Tracer.export()")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.trace, "r", encoding="utf-8") as f:
+        other = json.load(f).get("otherData", {})
+
+    print(f"{'calls':>8} {'total ms':>10} {'mean ms':>9} {'max ms':>9}  name")
+    for name, stats in list(other.get("summary", {}).items())[: args.limit]:
+        print(
+            f"{stats['calls']:8d} {stats['total_ms']:10.1f} "
+            f"{stats['mean_ms']:9.3f} {stats['max_ms']:9.2f}  {name}"
+        )
+    for name, value in sorted(other.get("counters", {}).items()):
+        print(f"{value:8d}  {name}")
@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import pathlib
+import numpy as np
+from book_store import open_book
+from create_book import STORAGE_PATH
+from manifest import CACHE_PATH
+from sqlite_book import SQLITE_NAME
+
+GRAPH_VERSION = 1
+ARRAYS = ("ids", "out_ptr", "out_dst", "out_style", "in_ptr", "in_src", "in_style")
+
+
+def source_signature(book_path):
+    """Identity of the files a book's links are stored in, to detect changes."""
+    if (book_path / SQLITE_NAME).exists():
+        names = (SQLITE_NAME, f"{SQLITE_NAME}-wal")
+    else:
+        names = ("links.csv",)
+
+    signature = []
+    for name in names:
+        try:
+            stat = (book_path / name).stat()
+        except OSError:
+            signature.append(None)
+            continue
+        signature.append([stat.st_ino, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def csr(keys, values, styles, count):
+    """Sort (key, value, style) triples by key into CSR offsets and arrays."""
+    order = np.argsort(keys, kind="stable")
+    ptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=count), out=ptr[1:])
+    return ptr, values[order], styles[order]
+
+
+def load_array(path):
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        return np.load(path)  # Empty arrays cannot be memory-mapped.
+
+
+def edge_positions(ptr, nodes):
+    """Positions of the CSR entries of nodes, and the node each one belongs to."""
+    starts = ptr[nodes]
+    lengths = ptr[nodes + 1] - starts
+    # One arange shifted per node, instead of a Python loop over slices.
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.repeat(nodes, lengths), offsets + np.arange(int(lengths.sum()))
+
+
+class LinkGraph:
+    """
+    Read-only link graph of a book in compressed sparse row form.
+
+    Pages are numbered by sorted page ID. Outgoing and incoming links are
+    stored as offset arrays into target and style-code arrays, saved as .npy
+    files in storage/cache/<book>/graph/ and memory-mapped on open. The cache
+    is rebuilt only when links.csv (or the SQLite file) changed since it was
+    written. Traversals are vectorized one BFS level at a time.
+    """
+
+    def __init__(self, book_path):
+        self.book_path = pathlib.Path(book_path)
+        self.path = CACHE_PATH / self.book_path.name / "graph"
+        self.components_cache = {}
+        if not self.load():
+            self.build()
+
+    def load(self):
+        try:
+            with (self.path / "meta.json").open("r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        signature = source_signature(self.book_path)
+        if meta.get("version") != GRAPH_VERSION or meta.get("signature") != signature:
+            return False
+
+        try:
+            for name in ARRAYS:
+                setattr(self, name, load_array(self.path / f"{name}.npy"))
+        except (OSError, ValueError):
+            return False
+        self.styles = meta["styles"]
+        return True
+
+    def build(self):
+        signature = source_signature(self.book_path)  # Taken before reading.
+        book = open_book(self.book_path)
+        links = list(book.links())
+        book.close()
+
+        src, dst, style = map(list, zip(*links)) if links else ([], [], [])
+        ids, inverse = np.unique(np.array(src + dst, dtype=str), return_inverse=True)
+        inverse = inverse.ravel()
+        src_idx, dst_idx = inverse[: len(links)], inverse[len(links) :]
+        styles, style_idx = np.unique(np.array(style, dtype=str), return_inverse=True)
+        style_idx = style_idx.ravel().astype(np.int32)
+
+        arrays = {"ids": ids}
+        arrays["out_ptr"], arrays["out_dst"], arrays["out_style"] = csr(
+            src_idx, dst_idx, style_idx, len(ids)
+        )
+        arrays["in_ptr"], arrays["in_src"], arrays["in_style"] = csr(
+            dst_idx, src_idx, style_idx, len(ids)
+        )
+
+        # Arrays first, meta.json last: it is what marks the cache valid.
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / "meta.json").unlink(missing_ok=True)
+        for name in ARRAYS:
+            tmp_path = self.path / f"{name}.tmp.npy"
+            np.save(tmp_path, arrays[name])
+            os.replace(tmp_path, self.path / f"{name}.npy")
+        tmp_path = self.path / "meta.tmp"
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": GRAPH_VERSION,
+                    "signature": signature,
+                    "styles": styles.tolist(),
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path / "meta.json")
+
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.styles = styles.tolist()
+        self.components_cache.clear()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def link_count(self):
+        return len(self.out_dst)
+
+    def number(self, page_id):
+        """Index of a page, or None if it has no links."""
+        index = int(np.searchsorted(self.ids, page_id))
+        if index < len(self.ids) and self.ids[index] == page_id:
+            return index
+        return None
+
+    def style_code(self, style):
+        """Code of a link style; -1 matches nothing, None means every style."""
+        if style is None:
+            return None
+        return self.styles.index(style) if style in self.styles else -1
+
+    def expand(self, nodes, style_code, direction):
+        """
+        Links of nodes as (from, to) page index arrays. direction is "out",
+        "in" or "both"; with a style code, other styles are skipped.
+        """
+        owners, found = [], []
+        for part, ptr, targets, styles in (
+            ("out", self.out_ptr, self.out_dst, self.out_style),
+            ("in", self.in_ptr, self.in_src, self.in_style),
+        ):
+            if direction not in (part, "both"):
+                continue
+            owner, positions = edge_positions(ptr, nodes)
+            if style_code is not None:
+                keep = styles[positions] == style_code
+                owner, positions = owner[keep], positions[keep]
+            owners.append(owner)
+            found.append(targets[positions])
+        return np.concatenate(owners), np.concatenate(found)
+
+    def neighbours(self, page_id, style=None):
+        """Pages this page links to."""
+        return self.adjacent(page_id, style, "out")
+
+    def backlinks(self, page_id, style=None):
+        """Pages linking to this page."""
+        return self.adjacent(page_id, style, "in")
+
+    def adjacent(self, page_id, style, direction):
+        index = self.number(page_id)
+        if index is None:
+            return []
+        nodes = np.array([index])
+        found = np.unique(self.expand(nodes, self.style_code(style), direction)[1])
+        return self.ids[found].tolist()
+
+    def k_hop(self, page_id, k, style=None, direction="both"):
+        """Pages within k links of page_id, as {page_id: distance}."""
+        index = self.number(page_id)
+        if index is None:
+            return {}
+
+        style_code = self.style_code(style)
+        distance = np.full(len(self.ids), -1, dtype=np.int32)
+        distance[index] = 0
+        frontier = np.array([index])
+        for hop in range(1, k + 1):
+            found = np.unique(self.expand(frontier, style_code, direction)[1])
+            frontier = found[distance[found] < 0]
+            if not len(frontier):
+                break
+            distance[frontier] = hop
+
+        reached = np.flatnonzero(distance >= 0)
+        return dict(zip(self.ids[reached].tolist(), distance[reached].tolist()))
+
+    def shortest_path(self, start, goal, style=None, directed=False):
+        """Page IDs of a shortest path from start to goal, or None."""
+        source, target = self.number(start), self.number(goal)
+        if source is None or target is None:
+            return None
+
+        style_code = self.style_code(style)
+        direction = "out" if directed else "both"
+        parent = np.full(len(self.ids), -1, dtype=np.int64)
+        parent[source] = source
+        frontier = np.array([source])
+        while len(frontier) and parent[target] < 0:
+            owners, found = self.expand(frontier, style_code, direction)
+            new = parent[found] < 0
+            found, first = np.unique(found[new], return_index=True)
+            parent[found] = owners[new][first]  # Whoever reached it first.
+            frontier = found
+
+        if parent[target] < 0:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        return self.ids[path[::-1]].tolist()
+
+    def components(self, style=None):
+        """Weakly connected component label per page index, cached per style."""
+        if style in self.components_cache:
+            return self.components_cache[style]
+
+        src = np.repeat(np.arange(len(self.ids)), np.diff(self.out_ptr))
+        dst = np.asarray(self.out_dst)
+        if style is not None:
+            keep = np.asarray(self.out_style) == self.style_code(style)
+            src, dst = src[keep], dst[keep]
+
+        # Hook every page to the smallest label among its links, then jump
+        # pointers until nothing changes; converges in a few rounds.
+        labels = np.arange(len(self.ids))
+        while True:
+            previous = labels.copy()
+            low = np.minimum(labels[src], labels[dst])
+            np.minimum.at(labels, labels[src], low)
+            np.minimum.at(labels, labels[dst], low)
+            while True:
+                jumped = labels[labels]
+                if np.array_equal(jumped, labels):
+                    break
+                labels = jumped
+            if np.array_equal(labels, previous):
+                break
+
+        self.components_cache[style] = labels
+        return labels
+
+    def component(self, page_id, style=None):
+        """Every page connected to page_id, in either direction."""
+        index = self.number(page_id)
+        if index is None:
+            return []
+        labels = self.components(style)
+        return self.ids[labels == labels[index]].tolist()
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Query the link graph of a book.")
+    parser.add_argument("book", help="Book name inside storage/bag/")
+    parser.add_argument("--style", help="Only follow links of this style")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("neighbours").add_argument("page")
+    commands.add_parser("backlinks").add_argument("page")
+    hop = commands.add_parser("hop")
+    hop.add_argument("page")
+    hop.add_argument("k", type=int)
+    path = commands.add_parser("path")
+    path.add_argument("start")
+    path.add_argument("goal")
+    commands.add_parser("components")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = LinkGraph(STORAGE_PATH / args.book)
+    print(f"Loaded {graph.link_count()} links in {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    if args.command == "neighbours":
+        result = graph.neighbours(args.page, args.style)
+    elif args.command == "backlinks":
+        result = graph.backlinks(args.page, args.style)
+    elif args.command == "hop":
+        result = graph.k_hop(args.page, args.k, args.style)
+    elif args.command == "path":
+        result = graph.shortest_path(args.start, args.goal, args.style)
+    else:
+        labels = graph.components(args.style)
+        sizes = np.bincount(np.unique(labels, return_inverse=True)[1].ravel())
+        result = f"{len(sizes)} components, largest has {sizes.max(initial=0)} pages"
+    elapsed = (time.perf_counter() - start) * 1000
+    print(result)
+    print(f"({elapsed:.2f} ms)")
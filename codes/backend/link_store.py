@@ -0,0 +1,160 @@
+import os
+import pathlib
+from create_check_id import locked
+
+COMPACT_MIN_LINES = 1024  # Journals shorter than this are never compacted.
+COMPACT_RATIO = 2  # Compact once the journal is this many times the live links.
+
+
+def parse_link_id(link_id):
+    """Split a "src-dst-style" link ID into its parts (page IDs contain no "-")."""
+    src, dst, style = link_id.split("-", 2)
+    return src, dst, style
+
+
+class LinkStore:
+    """
+    The links of one book.
+
+    links.csv is an append-only journal: one "src-dst-style" link ID per line,
+    with removals recorded as "!src-dst-style". The store replays the journal
+    once into a hash index for O(1) dedupe plus outgoing/incoming adjacency per
+    page, then only reads what other processes appended since. The journal is
+    rewritten without duplicates and removals once it grows too long.
+    """
+
+    def __init__(self, book_path):
+        self.book_path = pathlib.Path(book_path)
+        self.links_file = self.book_path / "links.csv"
+        self.lock_path = self.book_path / "links.lock"
+        self.links = {}  # link_id -> (src, dst, style), in creation order.
+        self.outgoing = {}  # page_id -> set of link IDs leaving the page.
+        self.incoming = {}  # page_id -> set of link IDs pointing at the page.
+        self.offset = 0  # Bytes of the journal already replayed.
+        self.inode = None  # Identity of the journal file that was replayed.
+        self.journal_lines = 0
+        self.sync()
+
+    def __len__(self):
+        return len(self.links)
+
+    def __contains__(self, link_id):
+        return link_id in self.links
+
+    def __iter__(self):
+        return iter(self.links)
+
+    def sync(self):
+        """Replay journal lines appended since the last sync."""
+        if not self.links_file.exists():
+            self.links_file.touch()  # touch() on an existing file bumps its mtime.
+
+        # A compaction by another process replaces the file; start over.
+        stat = self.links_file.stat()
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.reset()
+            self.inode = stat.st_ino
+
+        with self.links_file.open("rb") as file:
+            file.seek(self.offset)
+            data = file.read()
+
+        end = data.rfind(b"\n") + 1  # Leave a partial last line for later.
+        for line in data[:end].decode("utf-8").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            self.journal_lines += 1
+            if line.startswith("!"):
+                self.forget(line[1:])
+            else:
+                self.remember(line)
+        self.offset += end
+
+    def reset(self):
+        self.links.clear()
+        self.outgoing.clear()
+        self.incoming.clear()
+        self.offset = 0
+        self.journal_lines = 0
+
+    def remember(self, link_id):
+        if link_id in self.links:
+            return
+        try:
+            src, dst, style = parse_link_id(link_id)
+        except ValueError:
+            return  # Not a link ID; ignore the line.
+        self.links[link_id] = (src, dst, style)
+        self.outgoing.setdefault(src, set()).add(link_id)
+        self.incoming.setdefault(dst, set()).add(link_id)
+
+    def forget(self, link_id):
+        link = self.links.pop(link_id, None)
+        if link is None:
+            return
+        src, dst, _ = link
+        self.outgoing[src].discard(link_id)
+        self.incoming[dst].discard(link_id)
+
+    def append(self, line):
+        with self.links_file.open("ab") as file:
+            data = f"{line}\n".encode("utf-8")
+            file.write(data)
+        self.offset += len(data)
+        self.journal_lines += 1
+
+    def add(self, src, dst, style="default"):
+        """Add a link; returns its ID, or None if it already exists."""
+        link_id = f"{src}-{dst}-{style}"
+        with locked(self.lock_path):
+            self.sync()
+            if link_id in self.links:
+                return None
+            self.append(link_id)
+            self.remember(link_id)
+            self.maybe_compact()
+        return link_id
+
+    def remove(self, link_id):
+        """Remove a link; returns False if it did not exist."""
+        with locked(self.lock_path):
+            self.sync()
+            if link_id not in self.links:
+                return False
+            self.append(f"!{link_id}")
+            self.forget(link_id)
+            self.maybe_compact()
+        return True
+
+    def links_from(self, page_id):
+        return [self.links[link_id] for link_id in self.outgoing.get(page_id, ())]
+
+    def links_to(self, page_id):
+        return [self.links[link_id] for link_id in self.incoming.get(page_id, ())]
+
+    def neighbours(self, page_id):
+        """Pages this page links to."""
+        return [dst for _, dst, _ in self.links_from(page_id)]
+
+    def backlinks(self, page_id):
+        """Pages linking to this page."""
+        return [src for src, _, _ in self.links_to(page_id)]
+
+    def maybe_compact(self):
+        if (
+            self.journal_lines >= COMPACT_MIN_LINES
+            and self.journal_lines > COMPACT_RATIO * len(self.links)
+        ):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the journal as just the live links. Call with the lock held."""
+        tmp_file = self.links_file.with_suffix(".tmp")
+        data = "".join(f"{link_id}\n" for link_id in self.links).encode("utf-8")
+        with tmp_file.open("wb") as file:
+            file.write(data)
+        os.replace(tmp_file, self.links_file)
+        self.inode = self.links_file.stat().st_ino
+        self.offset = len(data)
+        self.journal_lines = len(self.links)
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import pathlib
+import threading
+from instrumentation import tracer
+
+CACHE_PATH = pathlib.Path("../../storage/cache/")
+MANIFEST_VERSION = 1
+
+# Layout of one manifest entry (stored as a list to keep the file compact).
+PAGE_ID, TITLE, X, Y, STYLE, MTIME, SIZE, HASH = range(8)
+
+
+def content_hash(raw_content):
+    """Stable hash of a page's stored content."""
+    if not isinstance(raw_content, str):
+        raw_content = json.dumps(raw_content)
+    return hashlib.blake2b(raw_content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class BookManifest:
+    """
+    Compact index of every page in a book: id, title, location, a reference into
+    a shared style table, the file's mtime/size and a hash of its content.
+
+    The graph view lays out a whole book from this one file and only opens page
+    files whose body it actually needs. The manifest is considered fresh while
+    the book directory's mtime is unchanged; writers that touch page files in
+    place call record_page() so it stays correct without a rescan. Files other
+    programs rewrite in place only show up in a deep refresh, which compares
+    every file's mtime and size.
+    """
+
+    def __init__(self, book_path):
+        self.book_path = pathlib.Path(book_path)
+        self.path = CACHE_PATH / self.book_path.name / "manifest.json"
+        self.dir_mtime_ns = None
+        self.styles = []  # Unique page_style dicts, referenced by index.
+        self.style_ids = {}  # Canonical style JSON -> index into self.styles.
+        self.entries = {}  # Page filename -> entry list (see layout above).
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self):
+        """Read the manifest from disk; returns False if it is missing or stale."""
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if stored.get("version") != MANIFEST_VERSION:
+            return False
+
+        self.dir_mtime_ns = stored["dir_mtime_ns"]
+        self.styles = []
+        self.style_ids = {}
+        for style in stored["styles"]:
+            self.intern_style(style)
+        self.entries = stored["pages"]
+        return True
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # A temporary name per writer: the graph view's loader, its autosave and
+        # the command line scripts may all save the manifest of the same book.
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "dir_mtime_ns": self.dir_mtime_ns,
+                    "styles": self.styles,
+                    "pages": self.entries,
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, self.path)
+
+    def intern_style(self, style):
+        key = json.dumps(style, sort_keys=True)
+        if key not in self.style_ids:
+            self.style_ids[key] = len(self.styles)
+            self.styles.append(style)
+        return self.style_ids[key]
+
+    def is_fresh(self):
+        try:
+            return self.book_path.stat().st_mtime_ns == self.dir_mtime_ns
+        except OSError:
+            return False
+
+    def refresh(self, deep=False):
+        """
+        Bring the manifest up to date with the book directory. Only files whose
+        mtime or size changed are parsed again. Unless deep is set, nothing is
+        checked while the directory mtime is unchanged. Returns True if any
+        entry changed.
+        """
+        if not deep and self.is_fresh():
+            return False
+
+        dir_mtime_ns = self.book_path.stat().st_mtime_ns
+        changed = False
+        seen = set()
+
+        with os.scandir(self.book_path) as it:
+            for item in it:
+                if not item.name.endswith(".json") or not item.is_file():
+                    continue
+                seen.add(item.name)
+
+                stat = item.stat()
+                entry = self.entries.get(item.name)
+                if (
+                    entry is not None
+                    and entry[MTIME] == stat.st_mtime_ns
+                    and entry[SIZE] == stat.st_size
+                ):
+                    continue
+
+                try:
+                    with tracer.timer("page.parse"), open(
+                        item.path, "r", encoding="utf-8"
+                    ) as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue  # Malformed pages are left out of the manifest.
+
+                self.entries[item.name] = self.make_entry(data, stat, item.name)
+                changed = True
+
+        for name in [n for n in self.entries if n not in seen]:
+            del self.entries[name]
+            changed = True
+
+        self.dir_mtime_ns = dir_mtime_ns
+        return changed
+
+    def make_entry(self, data, stat, filename):
+        location = data.get("page_location", {"x": 0, "y": 0})
+        return [
+            data.get("page_id", pathlib.Path(filename).stem),
+            data.get("page_title", ""),
+            location.get("x", 0),
+            location.get("y", 0),
+            self.intern_style(data.get("page_style", {})),
+            stat.st_mtime_ns,
+            stat.st_size,
+            content_hash(data.get("page_content", "")),
+        ]
+
+    def record_page(self, page_path, data):
+        """
+        Update the entry for a page file that was just written. The manifest
+        must have been refreshed right before the write (see open_manifest);
+        call adopt_writes() once the batch is recorded.
+        """
+        page_path = pathlib.Path(page_path)
+        self.entries[page_path.name] = self.make_entry(
+            data, page_path.stat(), page_path.name
+        )
+
+    def adopt_writes(self):
+        """
+        Take the directory's new mtime as our own, so recorded writes need no
+        rescan; but only if its page files are exactly the known ones. A file
+        another process added in the meantime leaves the mtime stale, and the
+        next refresh picks it up.
+        """
+        dir_mtime_ns = self.book_path.stat().st_mtime_ns  # Before listing.
+        with os.scandir(self.book_path) as it:
+            names = {
+                item.name
+                for item in it
+                if item.name.endswith(".json") and item.is_file()
+            }
+        if names == self.entries.keys():
+            self.dir_mtime_ns = dir_mtime_ns
+
+    def pages(self):
+        """Yield one dict per page, with its style resolved from the style table."""
+        for filename, entry in self.entries.items():
+            yield {
+                "file": self.book_path / filename,
+                "page_id": entry[PAGE_ID],
+                "title": entry[TITLE],
+                "x": entry[X],
+                "y": entry[Y],
+                "style": self.styles[entry[STYLE]],
+                "hash": entry[HASH],
+            }
+
+
+def open_manifest(book_path, deep=False):
+    """Load a book's manifest, refreshing and saving it if it was out of date."""
+    manifest = BookManifest(book_path)
+    manifest.load()
+    if manifest.refresh(deep) or not manifest.path.exists():
+        manifest.save()
+    return manifest
@@ -0,0 +1,68 @@
+import argparse
+import pathlib
+from book_store import FolderBook
+from sqlite_book import SQLITE_NAME, SqliteBook
+
+STORAGE_PATH = pathlib.Path("../../storage/bag/")
+BATCH_SIZE = 1000  # Pages per write transaction.
+
+
+def copy_book(source, target):
+    """Copy every page and link from one book backend into another."""
+    batch = []
+    for entry in list(source.pages()):
+        batch.append((entry["name"], source.read_page(entry["page_id"])))
+        if len(batch) >= BATCH_SIZE:
+            target.write_pages(batch)
+            batch = []
+    if batch:
+        target.write_pages(batch)
+
+    target.add_links(source.links())
+
+
+def to_sqlite(book_path, keep=False):
+    """Move a folder book into book.sqlite, removing the page files unless keep."""
+    source = FolderBook(book_path)
+    target = SqliteBook(book_path)
+    copy_book(source, target)
+    target.close()
+
+    if not keep:
+        for page_file in source.files.values():
+            page_file.unlink()
+        (book_path / "links.csv").unlink(missing_ok=True)
+
+
+def to_folder(book_path, keep=False):
+    """Write a SQLite book back out as page files, removing book.sqlite unless keep."""
+    source = SqliteBook(book_path)
+    target = FolderBook(book_path)
+    copy_book(source, target)
+    source.close()
+
+    if not keep:
+        for suffix in ("", "-wal", "-shm"):
+            (book_path / f"{SQLITE_NAME}{suffix}").unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert a book between the folder and SQLite backends."
+    )
+    parser.add_argument("book", help="Book name inside storage/bag/")
+    parser.add_argument("--to", choices=["sqlite", "folder"], required=True)
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the source files after copying"
+    )
+    args = parser.parse_args()
+
+    book_path = STORAGE_PATH / args.book
+    if not book_path.exists():
+        parser.error(f"The book '{args.book}' does not exist.")
+
+    if args.to == "sqlite":
+        to_sqlite(book_path, args.keep)
+    else:
+        to_folder(book_path, args.keep)
+    print(f"Book '{args.book}' migrated to {args.to}")
@@ -0,0 +1,29 @@
+class Page:
+    """
+    Compact in-memory record of one page. The body is not kept; style is a
+    shared Style object from the book's StyleTable.
+    """
+
+    __slots__ = ("page_id", "title", "x", "y", "style", "hash", "html", "render_queued")
+
+    def __init__(self, page_id, title, x, y, style, key):
+        self.page_id = page_id
+        self.title = title
+        self.x = x  # page_location coordinates: x to the right, y up.
+        self.y = y
+        self.style = style
+        self.hash = key  # Content hash, used as the render cache key.
+        self.html = None  # Rendered lazily, the first time the page is shown.
+        self.render_queued = False
+
+    @classmethod
+    def from_entry(cls, entry, styles):
+        """Build a page from a book index entry (see FolderBook/SqliteBook.pages)."""
+        return cls(
+            entry["page_id"],
+            entry["title"],
+            entry["x"],
+            entry["y"],
+            styles.resolve(entry["style"]),
+            entry["hash"],
+        )
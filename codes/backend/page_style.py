@@ -0,0 +1,111 @@
+import json
+import pathlib
+
+DEFAULT_STYLE = "default"
+STYLES_FILE = "styles.jsonl"  # Named styles of a book, one JSON object per line.
+
+
+def get_page_style(
+    color: str = "white",
+    font_size: int = 14,
+    font_family: str = "Arial",
+    font_weight: int = 400,
+    font_style: str = "normal",
+    text_decoration: str = "none",
+    padding: int = 7,
+    border: str = "1px solid white",
+    border_radius: int = 10,
+    border_style: str = "solid",
+    border_width: int = 2,
+    border_color: str = "white",
+    background_color: str = "black",
+):
+    """Returns a dictionary of styles with proper CSS units."""
+    return {
+        "color": color,
+        "font_size": f"{font_size}px",
+        "font_family": font_family,
+        "font_weight": str(font_weight),
+        "font_style": font_style,
+        "text_decoration": text_decoration,
+        "padding": f"{padding}px",
+        "border": border,  # Full border string like "1px solid white"
+        "border_radius": f"{border_radius}px",
+        "border_style": border_style,
+        "border_width": f"{border_width}px",
+        "border_color": border_color,
+        "background_color": background_color,
+    }
+
+
+class Style:
+    """
+    One interned page style. Every page using it shares this object, including
+    the Qt stylesheet string, which is built once here instead of per widget.
+    """
+
+    __slots__ = ("name", "fields", "stylesheet")
+
+    def __init__(self, name, fields):
+        self.name = name  # None for styles that are only embedded in pages.
+        self.fields = fields
+        self.stylesheet = "; ".join(
+            f"{k.replace('_', '-')}: {v}" for k, v in fields.items()
+        )
+
+
+class StyleTable:
+    """
+    The styles of one book. A page's page_style may be a full style dict or
+    the name of a style in the book's styles.jsonl ("default" always exists);
+    resolve() maps both onto shared Style objects.
+    """
+
+    def __init__(self, named=None):
+        self.by_key = {}  # Canonical style JSON -> Style.
+        self.by_name = {}
+        self.add(DEFAULT_STYLE, get_page_style())
+        for name, fields in (named or {}).items():
+            self.add(name, fields)
+
+    @classmethod
+    def load(cls, book_path):
+        named = {}
+        try:
+            with (pathlib.Path(book_path) / STYLES_FILE).open(
+                "r", encoding="utf-8"
+            ) as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        named[entry["name"]] = entry["style"]
+        except (OSError, ValueError, KeyError):
+            pass  # No (or a broken) styles file: only the default style.
+        return cls(named)
+
+    def __len__(self):
+        return len(self.by_key)
+
+    def add(self, name, fields):
+        style = Style(name, fields)
+        self.by_name[name] = style
+        self.by_key[json.dumps(fields, sort_keys=True)] = style
+        return style
+
+    def resolve(self, page_style):
+        """The shared Style for a page_style value (a name or a dict)."""
+        if page_style is None:
+            return self.by_name[DEFAULT_STYLE]
+        if isinstance(page_style, str):
+            return self.by_name.get(page_style, self.by_name[DEFAULT_STYLE])
+
+        key = json.dumps(page_style, sort_keys=True)
+        style = self.by_key.get(key)
+        if style is None:
+            style = self.by_key[key] = Style(None, page_style)
+        return style
+
+    def reference(self, page_style):
+        """What to store on disk: the style's name if it has one, else the dict."""
+        style = self.resolve(page_style)
+        return style.name if style.name is not None else page_style
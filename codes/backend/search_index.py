@@ -0,0 +1,292 @@
+import argparse
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import numpy as np
+from manifest import CACHE_PATH
+
+SEARCH_VERSION = 1
+TOKEN = re.compile(r"\w+")  # Markdown markup falls away between word tokens.
+TITLE_WEIGHT = 3  # A title word counts as this many body occurrences.
+PREFIX_WEIGHT = 0.5  # Score factor for words that only match as a prefix.
+MAX_EXPANSIONS = 64  # Vocabulary words a query prefix may expand to.
+SAVE_EVERY = 5000  # Pages re-indexed between intermediate saves.
+
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+def page_text(data):
+    content = data.get("page_content", "")
+    if not isinstance(content, str):
+        content = json.dumps(content)
+    return content
+
+
+class SearchIndex:
+    """
+    Inverted index over the titles and Markdown content of one book's pages.
+
+    Stored per book in storage/cache/<book>/search.json as each page's content
+    hash, title and term frequencies; the posting lists are rebuilt from that
+    on load. update() compares the hashes in the book's page index (the
+    manifest, which only re-reads files whose mtime or size changed) with the
+    indexed ones, so only new or edited pages are read.
+
+    Queries match every word as a prefix and rank pages with BM25. Pages are
+    numbered densely, and a term's postings are turned into NumPy arrays the
+    first time a query needs them, so scoring even the most common words is a
+    few vectorized operations. Safe to query while another thread runs update().
+    """
+
+    def __init__(self, book_path):
+        self.book_name = os.path.basename(os.path.normpath(book_path))
+        self.path = CACHE_PATH / self.book_name / "search.json"
+        self.docs = {}  # page_id -> [hash, title, length, {term: frequency}].
+        self.numbers = {}  # page_id -> dense page number.
+        self.page_ids = []  # Page number -> page_id, None for free numbers.
+        self.free = []
+        self.lengths = np.zeros(0)  # Page number -> length in words.
+        self.postings = {}  # term -> {page number: frequency}.
+        self.arrays = {}  # term -> (page numbers, frequencies), built on demand.
+        self.total_length = 0
+        self.vocabulary = None  # Sorted terms for prefix lookups, built lazily.
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.load()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def load(self):
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return  # A missing or corrupt index is simply rebuilt.
+        if stored.get("version") != SEARCH_VERSION:
+            return
+
+        for page_id, doc in stored["docs"].items():
+            self.add(page_id, *doc)
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The start window's indexer and a graph view may save the same book.
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with self.lock:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": SEARCH_VERSION, "docs": self.docs},
+                    f,
+                    separators=(",", ":"),
+                )
+            self.dirty = False
+        os.replace(tmp_path, self.path)
+
+    def add(self, page_id, key, title, length, terms):
+        if self.free:
+            number = self.free.pop()
+            self.page_ids[number] = page_id
+        else:
+            number = len(self.page_ids)
+            self.page_ids.append(page_id)
+            if number >= len(self.lengths):
+                self.lengths = np.resize(self.lengths, max(1024, 2 * number))
+        self.numbers[page_id] = number
+        self.lengths[number] = length
+
+        self.docs[page_id] = [key, title, length, terms]
+        self.total_length += length
+        for term, frequency in terms.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                self.vocabulary = None
+            postings[number] = frequency
+            self.arrays.pop(term, None)
+
+    def remove(self, page_id):
+        _, _, length, terms = self.docs.pop(page_id)
+        number = self.numbers.pop(page_id)
+        self.page_ids[number] = None
+        self.free.append(number)
+        self.total_length -= length
+        for term in terms:
+            postings = self.postings[term]
+            del postings[number]
+            self.arrays.pop(term, None)
+            if not postings:
+                del self.postings[term]
+                self.vocabulary = None
+
+    def index_page(self, page_id, key, title, text):
+        """Index (or re-index) one page from its title and raw content."""
+        terms = {}
+        for term in tokenize(title):
+            terms[term] = terms.get(term, 0) + TITLE_WEIGHT
+        body = tokenize(text)
+        for term in body:
+            terms[term] = terms.get(term, 0) + 1
+
+        with self.lock:
+            if page_id in self.docs:
+                self.remove(page_id)
+            self.add(page_id, key, title, len(body), terms)
+            self.dirty = True
+
+    def update(self, book, cancelled=None):
+        """
+        Bring the index in line with a book (FolderBook or SqliteBook), reading
+        only pages whose content hash changed. Returns the number of pages
+        re-indexed. Stops early, keeping what was done, once cancelled is set.
+        """
+        seen = set()
+        changed = 0
+        for page in book.pages(deep=True):
+            if cancelled is not None and cancelled.is_set():
+                break
+            page_id = page["page_id"]
+            seen.add(page_id)
+            doc = self.docs.get(page_id)
+            if doc is not None and doc[0] == page["hash"]:
+                if doc[1] != page["title"]:
+                    with self.lock:
+                        doc[1] = page["title"]
+                        self.dirty = True
+                continue
+
+            try:
+                data = book.read_page(page_id)
+            except (OSError, ValueError, KeyError):
+                continue
+            self.index_page(page_id, page["hash"], page["title"], page_text(data))
+            changed += 1
+            if changed % SAVE_EVERY == 0:
+                self.save()
+        else:
+            with self.lock:
+                for page_id in [p for p in self.docs if p not in seen]:
+                    self.remove(page_id)
+                    self.dirty = True
+        self.save()
+        return changed
+
+    def expand(self, word):
+        """Indexed terms starting with word, as (term, weight); exact match first."""
+        if self.vocabulary is None:
+            self.vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self.vocabulary, word)
+        matches = []
+        for term in self.vocabulary[start : start + MAX_EXPANSIONS]:
+            if not term.startswith(word):
+                break
+            matches.append((term, 1.0 if term == word else PREFIX_WEIGHT))
+        return matches
+
+    def term_arrays(self, term):
+        arrays = self.arrays.get(term)
+        if arrays is None:
+            postings = self.postings[term]
+            arrays = self.arrays[term] = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+        return arrays
+
+    def search(self, query, limit=20):
+        """
+        Pages matching every word of query (as a prefix), best first, as
+        (page_id, title, score) tuples.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self.lock:
+            count = len(self.docs)
+            if not count:
+                return []
+            groups = [self.expand(word) for word in words]
+            if not all(groups):
+                return []
+
+            size = len(self.page_ids)
+            norms = K1 * (
+                1 - B + B * self.lengths[:size] / max(1, self.total_length / count)
+            )
+            scores = np.zeros(size)
+            matches = np.ones(size, dtype=bool)
+            for group in groups:
+                # A word scores each page by its best-matching expansion.
+                best = np.zeros(size)
+                for term, weight in group:
+                    numbers, frequencies = self.term_arrays(term)
+                    idf = math.log(
+                        1 + (count - len(numbers) + 0.5) / (len(numbers) + 0.5)
+                    )
+                    term_scores = (
+                        weight
+                        * idf
+                        * frequencies
+                        * (K1 + 1)
+                        / (frequencies + norms[numbers])
+                    )
+                    best[numbers] = np.maximum(best[numbers], term_scores)
+                matches &= best > 0
+                scores += best
+
+            hits = np.flatnonzero(matches)
+            if len(hits) > limit:
+                hits = hits[np.argpartition(scores[hits], -limit)[-limit:]]
+            hits = hits[np.argsort(-scores[hits], kind="stable")]
+            return [
+                (self.page_ids[n], self.docs[self.page_ids[n]][1], float(scores[n]))
+                for n in hits
+            ]
+
+
+def search_books(indexes, query, limit=20):
+    """Search several books' indexes; returns (book, page_id, title, score) tuples."""
+    hits = []
+    for book_name, index in indexes.items():
+        hits.extend((book_name, *hit) for hit in index.search(query, limit))
+    return heapq.nlargest(limit, hits, key=lambda hit: hit[3])
+
+
+if __name__ == "__main__":
+    import time
+    from book_store import open_book
+    from create_book import STORAGE_PATH
+
+    parser = argparse.ArgumentParser(description="Search the pages of a book.")
+    parser.add_argument("book", help="Book name inside storage/bag/")
+    parser.add_argument("query", nargs="+")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    book = open_book(STORAGE_PATH / args.book)
+    index = SearchIndex(STORAGE_PATH / args.book)
+    start = time.perf_counter()
+    changed = index.update(book)
+    print(f"Indexed {changed} changed pages in {time.perf_counter() - start:.2f}s")
+    book.close()
+
+    start = time.perf_counter()
+    hits = index.search(" ".join(args.query), args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    for page_id, title, score in hits:
+        print(f"{score:6.2f}  {page_id}  {title}")
+    print(f"{len(hits)} results in {elapsed:.1f} ms")
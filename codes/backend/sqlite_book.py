@@ -0,0 +1,208 @@
+import json
+import pathlib
+import sqlite3
+import threading
+from instrumentation import tracer
+from manifest import content_hash
+from page_style import StyleTable
+
+SQLITE_NAME = "book.sqlite"  # A book folder holding this file uses SQLite.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS styles (
+    style_id INTEGER PRIMARY KEY,
+    style TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS pages (
+    page_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    style_id INTEGER NOT NULL REFERENCES styles (style_id),
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_location ON pages (x, y);
+CREATE TABLE IF NOT EXISTS links (
+    link_id TEXT PRIMARY KEY,
+    src TEXT NOT NULL,
+    dst TEXT NOT NULL,
+    style TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS links_src ON links (src);
+CREATE INDEX IF NOT EXISTS links_dst ON links (dst);
+"""
+
+
+class SqliteBook:
+    """
+    A whole book in one SQLite file: pages, an interned style table and links,
+    written in batched transactions. Shares its interface with FolderBook.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, book_path):
+        self.book_path = pathlib.Path(book_path)
+        self.db_path = self.book_path / SQLITE_NAME
+        self.book_path.mkdir(parents=True, exist_ok=True)
+
+        # The graph view reads pages from its loader threads, so one connection
+        # is shared behind a lock.
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+        self.style_ids = {}
+        self.styles = StyleTable.load(self.book_path)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def style_id(self, style):
+        key = json.dumps(style, sort_keys=True)
+        if key not in self.style_ids:
+            self.db.execute("INSERT OR IGNORE INTO styles (style) VALUES (?)", (key,))
+            (self.style_ids[key],) = self.db.execute(
+                "SELECT style_id FROM styles WHERE style = ?", (key,)
+            ).fetchone()
+        return self.style_ids[key]
+
+    def pages(self, deep=False):
+        """
+        Yield one entry per page without loading page contents. The pages
+        table is always current, so deep is accepted for interface parity only.
+        """
+        with self.lock:
+            styles = {
+                style_id: json.loads(style)
+                for style_id, style in self.db.execute(
+                    "SELECT style_id, style FROM styles"
+                )
+            }
+            rows = self.db.execute(
+                "SELECT page_id, name, title, x, y, style_id, hash FROM pages"
+            ).fetchall()
+
+        for page_id, name, title, x, y, style_id, key in rows:
+            yield {
+                "page_id": page_id,
+                "name": name,
+                "title": title,
+                "x": x,
+                "y": y,
+                "style": styles[style_id],
+                "hash": key,
+            }
+
+    def read_page(self, page_id):
+        """Full page data, in the same shape as a page JSON file."""
+        with tracer.timer("page.parse"), self.lock:
+            row = self.db.execute(
+                "SELECT p.title, p.content, p.x, p.y, s.style FROM pages p "
+                "JOIN styles s ON s.style_id = p.style_id WHERE p.page_id = ?",
+                (page_id,),
+            ).fetchone()
+        if row is None:
+            raise KeyError(page_id)
+
+        title, content, x, y, style = row
+        return {
+            "page_title": title,
+            "page_id": page_id,
+            "page_content": content,
+            "page_location": {"x": x, "y": y},
+            "page_style": json.loads(style),
+        }
+
+    def write_pages(self, pages, workers=1, sync=False):
+        """
+        Insert or replace (name, data) pairs in a single transaction. SQLite
+        serializes writes, so workers is accepted for interface parity only.
+        With sync, the transaction is on disk when this returns.
+        """
+        with self.lock:
+            if sync:
+                self.db.execute("PRAGMA synchronous = FULL")
+            try:
+                self.insert_pages(pages)
+            finally:
+                if sync:
+                    self.db.execute("PRAGMA synchronous = NORMAL")
+
+    def insert_pages(self, pages):
+        with self.db:
+            rows = []
+            for name, data in pages:
+                content = data.get("page_content", "")
+                location = data.get("page_location", {"x": 0, "y": 0})
+                rows.append(
+                    (
+                        data["page_id"],
+                        name,
+                        data.get("page_title", ""),
+                        content if isinstance(content, str) else json.dumps(content),
+                        location.get("x", 0),
+                        location.get("y", 0),
+                        self.style_id(self.styles.reference(data.get("page_style"))),
+                        content_hash(content),
+                    )
+                )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def update_pages(self, updates, workers=1, sync=False):
+        """
+        Merge {page_id: {field: value}} into the stored pages and write them
+        back in one transaction. Pages deleted in the meantime are skipped;
+        returns their IDs.
+        """
+        pages = []
+        skipped = []
+        for page_id, fields in updates.items():
+            with self.lock:
+                row = self.db.execute(
+                    "SELECT name FROM pages WHERE page_id = ?", (page_id,)
+                ).fetchone()
+            if row is None:
+                skipped.append(page_id)
+                continue
+            data = self.read_page(page_id)
+            data.update(fields)
+            pages.append((row[0], data))
+        self.write_pages(pages, workers, sync)
+        return skipped
+
+    def add_link(self, src, dst, style="default"):
+        """Add a link; returns its ID, or None if it already exists."""
+        link_id = f"{src}-{dst}-{style}"
+        with self.lock, self.db:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO links VALUES (?, ?, ?, ?)",
+                (link_id, src, dst, style),
+            )
+        return link_id if cursor.rowcount else None
+
+    def add_links(self, links):
+        """Add many (src, dst, style) links in a single transaction."""
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO links VALUES (?, ?, ?, ?)",
+                (
+                    (f"{src}-{dst}-{style}", src, dst, style)
+                    for src, dst, style in links
+                ),
+            )
+
+    def release_links(self):
+        pass  # Links are read from the database each time; nothing is held.
+
+    def links(self):
+        """Yield every link as (src, dst, style)."""
+        with self.lock:
+            rows = self.db.execute("SELECT src, dst, style FROM links").fetchall()
+        yield from rows
@@ -0,0 +1,144 @@
+import argparse
+import pathlib
+import random
+import string
+import sys
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent / "backend"))
+from book_store import FolderBook
+from bulk_import import grid_location
+from create_book import STORAGE_PATH, create_book
+from page_style import get_page_style
+from sqlite_book import SqliteBook
+
+WORDS = (
+    "neuron synapse graph memory idea note link page book concept network "
+    "signal layer weight model theory proof lemma example result method data "
+    "structure pattern history source question answer summary detail context "
+    "the a of and to in is for on with as by that this from at it be are"
+).split()
+LANGUAGES = ["python", "bash", "json"]
+BATCH_SIZE = 2000
+
+
+def page_ids(count, rng):
+    """count distinct IDs in the real 6-character format."""
+    ids = set()
+    while len(ids) < count:
+        ids.add("".join(rng.choices(string.ascii_lowercase + string.digits, k=6)))
+    return sorted(ids, key=lambda _: rng.random())
+
+
+def sentence(rng, low=6, high=18):
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return " ".join(words).capitalize() + "."
+
+
+def markdown_page(rng, title, linked_titles):
+    """A page of plausible Markdown: headings, paragraphs, lists, code, links."""
+    parts = [f"# {title}", " ".join(sentence(rng) for _ in range(rng.randint(2, 5)))]
+    for _ in range(rng.randint(0, 3)):
+        parts.append(f"## {sentence(rng, 2, 5)[:-1]}")
+        parts.append(" ".join(sentence(rng) for _ in range(rng.randint(1, 4))))
+        if rng.random() < 0.4:
+            parts.append("\n".join(f"- {sentence(rng, 3, 8)}" for _ in range(4)))
+        if rng.random() < 0.2:
+            code = "\n".join(sentence(rng, 3, 6) for _ in range(3))
+            parts.append(f"```{rng.choice(LANGUAGES)}\n{code}\n```")
+    if linked_titles:
+        parts.append("See also: " + ", ".join(f"[{t}](#)" for t in linked_titles))
+    return "\n\n".join(parts)
+
+
+def generate_links(ids, links_per_page, rng):
+    """
+    Mostly local links (pages close together on the grid) plus a share of
+    long-range ones, about links_per_page per page on average.
+    """
+    links = set()
+    count = len(ids)
+    target = int(count * links_per_page)
+    while len(links) < target and count > 1:
+        src = rng.randrange(count)
+        if rng.random() < 0.8:
+            dst = (src + rng.randint(-50, 50)) % count
+        else:
+            dst = rng.randrange(count)
+        if dst != src:
+            style = "default" if rng.random() < 0.9 else "reference"
+            links.add((ids[src], ids[dst], style))
+    return sorted(links, key=lambda _: rng.random())
+
+
+def generate_book(name, pages, links_per_page=5.0, backend="folder", seed=0):
+    """
+    Write a synthetic book to storage/bag/<name>/ in the real format and
+    return its path. The same arguments always produce the same book.
+    """
+    rng = random.Random(seed)
+    book_path = STORAGE_PATH / name
+    create_book(book_path)
+    store = SqliteBook(book_path) if backend == "sqlite" else FolderBook(book_path)
+
+    ids = page_ids(pages, rng)
+    links = generate_links(ids, links_per_page, rng)
+    outgoing = {}
+    for src, dst, _ in links:
+        outgoing.setdefault(src, []).append(dst)
+    titles = {
+        page_id: f"Page {index} {rng.choice(WORDS)}"
+        for index, page_id in enumerate(ids)
+    }
+
+    start = time.perf_counter()
+    style = get_page_style()
+    for batch_start in range(0, pages, BATCH_SIZE):
+        batch = []
+        for index in range(batch_start, min(pages, batch_start + BATCH_SIZE)):
+            page_id = ids[index]
+            title = titles[page_id]
+            linked = [titles[dst] for dst in outgoing.get(page_id, [])[:5]]
+            batch.append(
+                (
+                    f"{page_id}_{title.replace(' ', '_')}",
+                    {
+                        "page_title": title,
+                        "page_id": page_id,
+                        "page_content": markdown_page(rng, title, linked),
+                        "page_location": grid_location(index),
+                        "page_style": style,
+                    },
+                )
+            )
+        store.write_pages(batch, workers=8)
+
+    if backend == "sqlite":
+        store.add_links(links)
+    else:
+        # links.csv is an append-only journal of link IDs; write it in one go.
+        with (book_path / "links.csv").open("w", encoding="utf-8") as f:
+            f.writelines(f"{src}-{dst}-{style}\n" for src, dst, style in links)
+    store.close()
+
+    print(
+        f"Generated {pages} pages and {len(links)} links in "
+        f"{time.perf_counter() - start:.1f}s at {book_path}"
+    )
+    return book_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic book for benchmarking."
+    )
+    parser.add_argument("book", help="Book name inside storage/bag/")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--links-per-page", type=float, default=5.0)
+    parser.add_argument("--backend", choices=["folder", "sqlite"], default="folder")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if (STORAGE_PATH / args.book).exists():
+        parser.error(f"The book '{args.book}' already exists.")
+    generate_book(args.book, args.pages, args.links_per_page, args.backend, args.seed)
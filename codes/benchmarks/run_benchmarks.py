@@ -0,0 +1,315 @@
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import platform
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent / "backend"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent / "frontend"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent.parent))
+from book_store import open_book
+from create_book import STORAGE_PATH
+from create_check_id import IdAllocator
+from generate_book import generate_book
+from manifest import CACHE_PATH
+from sqlite_book import SQLITE_NAME
+from version import VERSION
+
+RESULTS_PATH = pathlib.Path("results")
+SIZES = [1000, 10000]
+ZOOMS = [1.0, 0.3, 0.1]  # Widgets, thumbnails and plain boxes.
+FRAMES = 60
+VIEW_SIZE = (1280, 800)
+PAN_STEP = (7, 3)  # Pixels per frame, like a slow drag.
+ID_COUNTS = [100000, 1000000]
+ID_RESERVES = 200
+LINK_ADDS = 500
+
+
+def summarize(samples):
+    """Timing samples (seconds) as milliseconds statistics."""
+    samples = sorted(samples)
+    count = len(samples)
+    return {
+        "runs": count,
+        "mean_ms": 1000 * sum(samples) / count,
+        "p50_ms": 1000 * samples[count // 2],
+        "p95_ms": 1000 * samples[min(count - 1, int(count * 0.95))],
+        "max_ms": 1000 * samples[-1],
+    }
+
+
+def bench_book_name(pages, links_per_page, backend, seed):
+    return f"bench_{pages}_{links_per_page:g}_{backend}_{seed}"
+
+
+def ensure_book(pages, links_per_page, backend, seed):
+    """The synthetic book for these parameters, generated on first use."""
+    name = bench_book_name(pages, links_per_page, backend, seed)
+    if not (STORAGE_PATH / name).exists():
+        generate_book(name, pages, links_per_page, backend, seed)
+    return name
+
+
+def settle(app, view):
+    while view.load_timer.isActive():
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents()
+
+
+def bench_load(app, book_name, cold):
+    """
+    Time MovableViewport.loadPages until every page is on the scene. A cold
+    load starts without the book's cache (manifest, renders, search index).
+    """
+    from graph_view import MovableViewport
+
+    if cold:
+        shutil.rmtree(CACHE_PATH / book_name, ignore_errors=True)
+
+    view = MovableViewport(book_name)
+    view.resize(*VIEW_SIZE)
+    view.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    view.loadPages(book_name)
+    first_page = None
+    while view.load_timer.isActive():
+        app.processEvents()
+        if first_page is None and view.pages:
+            first_page = time.perf_counter() - start
+        time.sleep(0.001)
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "pages": len(view.pages),
+        "links": len(view.edges),
+        "first_page_ms": 1000 * (first_page if first_page is not None else elapsed),
+        "total_ms": 1000 * elapsed,
+    }
+    return view, result
+
+
+def bench_pan(app, view, frames=FRAMES):
+    """Time synchronous paintEvent frames while panning, per zoom level."""
+    from PyQt6.QtCore import QPointF
+
+    results = {}
+    for zoom in ZOOMS:
+        view.zoom = zoom
+        view.offset = QPointF(0, 0)
+        view.apply_transform()
+        view.viewport().repaint()
+        settle(app, view)  # Widgets and renders for the first frame.
+
+        samples = []
+        for _ in range(frames):
+            view.offset += QPointF(*PAN_STEP)
+            view.apply_transform()
+            start = time.perf_counter()
+            view.viewport().repaint()
+            samples.append(time.perf_counter() - start)
+            app.processEvents()  # Deferred work lands between frames, as live.
+        results[f"zoom_{zoom:g}"] = summarize(samples)
+    return results
+
+
+def bench_ids(count, reserves=ID_RESERVES, seed=0):
+    """Time IdAllocator against an ids.csv that already holds count IDs."""
+    rng = random.Random(seed)
+    characters = string.ascii_lowercase + string.digits
+    with tempfile.TemporaryDirectory() as tmp:
+        ids_path = pathlib.Path(tmp) / "ids.csv"
+        with ids_path.open("w", encoding="utf-8") as f:
+            f.writelines(
+                "".join(rng.choices(characters, k=6)) + "\n" for _ in range(count)
+            )
+
+        allocator = IdAllocator(ids_path)
+        start = time.perf_counter()
+        allocator.sync()
+        first_sync = time.perf_counter() - start
+
+        reserve = []
+        for _ in range(reserves):
+            start = time.perf_counter()
+            allocator.reserve(1)
+            reserve.append(time.perf_counter() - start)
+
+        check = []
+        for _ in range(reserves):
+            page_id = "".join(rng.choices(characters, k=6))
+            start = time.perf_counter()
+            page_id in allocator
+            check.append(time.perf_counter() - start)
+
+    return {
+        "ids": count,
+        "first_sync_ms": 1000 * first_sync,
+        "create_id": summarize(reserve),
+        "check_id": summarize(check),
+    }
+
+
+def bench_link_dedupe(book_name, adds=LINK_ADDS, seed=0):
+    """
+    Time store.add_link on a copy of a book's links: the call create_link.py's
+    create_link_with_name makes, for links that exist and links that don't.
+    """
+    book_path = STORAGE_PATH / book_name
+    book = open_book(book_path)
+    links = list(book.links())
+    page_ids = [page["page_id"] for page in book.pages()]
+    book.close()
+
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_path = pathlib.Path(tmp) / book_name
+        copy_path.mkdir()
+        for name in ("links.csv", SQLITE_NAME, f"{SQLITE_NAME}-wal"):
+            if (book_path / name).exists():
+                shutil.copy2(book_path / name, copy_path / name)
+
+        start = time.perf_counter()
+        store = open_book(copy_path)
+        next(iter(store.links()), None)  # Loads (replays) the links.
+        open_time = time.perf_counter() - start
+
+        duplicate = []
+        for src, dst, style in rng.sample(links, min(adds, len(links))):
+            start = time.perf_counter()
+            store.add_link(src, dst, style)
+            duplicate.append(time.perf_counter() - start)
+
+        new = []
+        for _ in range(adds):
+            src, dst = rng.sample(page_ids, 2)
+            start = time.perf_counter()
+            store.add_link(src, dst, "benchmark")
+            new.append(time.perf_counter() - start)
+        store.close()
+
+    return {
+        "links": len(links),
+        "open_ms": 1000 * open_time,
+        "duplicate": summarize(duplicate) if duplicate else None,
+        "new": summarize(new),
+    }
+
+
+def machine_info():
+    from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "qpa_platform": os.environ.get("QT_QPA_PLATFORM"),
+    }
+
+
+def flatten(results, prefix=""):
+    """{"a": {"b_ms": 1}} -> {"a.b_ms": 1}, keeping only timings."""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif key.endswith("_ms"):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(baseline, current):
+    """Print every timing next to its baseline value, slowest changes first."""
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    rows = [
+        (new[key] / old[key], key, old[key], new[key])
+        for key in new
+        if key in old and old[key] > 0
+    ]
+    for ratio, key, before, after in sorted(rows, reverse=True):
+        print(f"{ratio:6.2f}x  {before:10.2f} -> {after:10.2f} ms  {key}")
+
+
+def run(args):
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    report = {
+        "version": VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "config": vars(args),
+        "results": {},
+    }
+    results = report["results"]
+
+    for pages in args.sizes:
+        book_name = ensure_book(pages, args.links_per_page, args.backend, args.seed)
+        print(f"Benchmarking {book_name}", flush=True)
+        book_results = results[f"pages_{pages}"] = {"book": book_name}
+
+        view, book_results["load_cold"] = bench_load(app, book_name, cold=True)
+        view.close()
+        view, book_results["load_warm"] = bench_load(app, book_name, cold=False)
+        book_results["pan"] = bench_pan(app, view, args.frames)
+        view.close()
+        book_results["link_dedupe"] = bench_link_dedupe(book_name, seed=args.seed)
+
+        if not args.keep:
+            shutil.rmtree(STORAGE_PATH / book_name)
+            shutil.rmtree(CACHE_PATH / book_name, ignore_errors=True)
+
+    for count in args.id_counts:
+        print(f"Benchmarking create_id with {count} IDs", flush=True)
+        results[f"ids_{count}"] = bench_ids(count, seed=args.seed)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the hot paths on synthetic books and save the results as JSON."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--links-per-page", type=float, default=5.0)
+    parser.add_argument("--backend", choices=["folder", "sqlite"], default="folder")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--id-counts", type=int, nargs="+", default=ID_COUNTS)
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep the generated books in storage/bag/ for the next run",
+    )
+    parser.add_argument("--output", help="Results file (default: results/<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        output = pathlib.Path(args.output)
+    else:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_PATH / f"{VERSION}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
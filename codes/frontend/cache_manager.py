@@ -0,0 +1,109 @@
+# cache_manager.py
+
+import os
+from collections import OrderedDict
+
+BUDGET_ENV = "NEURONOTE_CACHE_MB"  # Overrides the budget, in megabytes.
+MEMORY_SHARE = 0.25  # Share of physical memory the open books may use.
+FALLBACK_BUDGET = 2 * 1024**3  # Used where physical memory can't be read.
+
+# Rough sizes of the per-page and per-link records no cache measures itself.
+PAGE_BYTES = 1200  # Page record, spatial index entry and loader index entry.
+LINK_BYTES = 600  # Edge layer entry plus the loader's and link store's copies.
+SEARCH_PAGE_BYTES = 4000  # Postings and stored term counts of one page.
+
+
+def memory_budget():
+    """Bytes all open books may use together."""
+    override = os.environ.get(BUDGET_ENV)
+    if override:
+        return int(float(override) * 1024**2)
+    try:
+        physical = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return FALLBACK_BUDGET
+    return int(physical * MEMORY_SHARE)
+
+
+class CacheManager:
+    """
+    One memory budget over the caches of every open book.
+
+    Books (graph views) are registered by name and kept in least-recently-
+    used order; touch() marks one as used. Each reports its memory per kind
+    with memory_usage(): "manifest" (page records, always kept), "pages"
+    (rendered HTML held by pages), "html" (render cache), "pixmaps"
+    (thumbnails), "links" (edge layer and link indexes) and "search".
+    enforce() brings the total under the budget in three steps, each only
+    as far as needed: books not in view are trimmed to their manifest,
+    least recently used first; then closed; then the books in view shrink
+    their caches. Entries registered as not closable (the start window,
+    with its search indexes) are only ever trimmed or shrunk.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = memory_budget() if budget is None else budget
+        self.books = OrderedDict()  # name -> book, least recently used first.
+        self.pinned = set()  # Names that enforce() never closes.
+
+    def __len__(self):
+        return len(self.books)
+
+    def register(self, name, book, closable=True):
+        self.books[name] = book
+        self.books.move_to_end(name)
+        if not closable:
+            self.pinned.add(name)
+
+    def unregister(self, name, book=None):
+        if book is None or self.books.get(name) is book:
+            self.books.pop(name, None)
+            self.pinned.discard(name)
+
+    def touch(self, name):
+        if name in self.books:
+            self.books.move_to_end(name)
+
+    def usage(self):
+        """{book name: {kind: bytes}}, least recently used first."""
+        return {name: book.memory_usage() for name, book in self.books.items()}
+
+    def total(self, usage=None):
+        usage = self.usage() if usage is None else usage
+        return sum(sum(kinds.values()) for kinds in usage.values())
+
+    def enforce(self):
+        """Trim, close or shrink books until the total fits the budget."""
+        usage = self.usage()
+        total = self.total(usage)
+        if total <= self.budget:
+            return total
+
+        hidden = [name for name, book in self.books.items() if not book.isVisible()]
+        for name in hidden:
+            if total <= self.budget:
+                return total
+            book = self.books[name]
+            if book.trim_caches():
+                before = sum(usage[name].values())
+                usage[name] = book.memory_usage()
+                total += sum(usage[name].values()) - before
+
+        for name in hidden:
+            if total <= self.budget:
+                return total
+            if name in self.pinned:
+                continue
+            book = self.books.pop(name)
+            total -= sum(usage.pop(name).values())
+            book.close()
+            book.deleteLater()
+
+        for name, book in list(self.books.items()):
+            if total <= self.budget:
+                break
+            before = sum(usage[name].values())
+            book.shrink_caches()
+            usage[name] = book.memory_usage()
+            total += sum(usage[name].values()) - before
+        return total
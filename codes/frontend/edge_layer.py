@@ -0,0 +1,216 @@
+# edge_layer.py
+
+import math
+import zlib
+
+import numpy as np
+from PyQt6.QtCore import Qt, QLineF, QRectF
+from PyQt6.QtGui import QColor, QPainter, QPen, QPixmap
+
+EDGE_HIDE_ZOOM = 0.08  # Zoomed out further than this, links are not drawn.
+MIN_EDGE_PIXELS = 3  # Links shorter than this on screen are skipped.
+MAX_VISIBLE_EDGES = 10_000  # Beyond this, an evenly spaced subset is drawn.
+CACHE_MARGIN = 0.5  # Cached edge pixmap extends this many viewports each side.
+
+LINK_STYLE_COLORS = {"default": "#808080"}
+LINK_PALETTE = ["#4e79a7", "#f28e2b", "#e15759", "#76b7b2", "#59a14f", "#edc948"]
+
+
+def link_pen(style):
+    """Cosmetic pen for a link style; unknown styles get a stable palette colour."""
+    color = LINK_STYLE_COLORS.get(style)
+    if color is None:
+        color = LINK_PALETTE[zlib.crc32(style.encode("utf-8")) % len(LINK_PALETTE)]
+    pen = QPen(QColor(color), 1.5)
+    pen.setCosmetic(True)
+    return pen
+
+
+class EdgeLayer:
+    """
+    Links of the open book, drawn underneath the pages.
+
+    Endpoints live in NumPy arrays, so culling against the viewport and the
+    level-of-detail filters are vectorized over every link. The surviving links
+    are grouped by link style and drawn with one drawLines call per style into
+    a pixmap covering the viewport plus a margin; panning within the margin
+    only blits that pixmap.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.links = []  # (src, dst, style) per edge index.
+        self.index_of = {}  # (src, dst, style) -> edge index, for live links.
+        self.styles = []
+        self.pens = []
+        self.by_page = {}  # page_id -> edge indices touching the page.
+        self.style_idx = np.zeros(0, dtype=np.int32)
+        self.coords = np.full((0, 4), np.nan)  # x0, y0, x1, y1 per edge.
+        self.update_bounds()
+
+    def __len__(self):
+        return len(self.index_of)
+
+    def set_links(self, links, centers):
+        """
+        Replace all links. centers maps page_id -> scene (x, y) of the page's
+        centre; links to pages not placed yet stay hidden until move_page().
+        """
+        self.clear()
+        self.add_links(links, centers)
+
+    def add_links(self, links, centers):
+        """Append links that are not drawn yet; centers as for set_links()."""
+        style_ids = {style: index for index, style in enumerate(self.styles)}
+        style_idx = []
+        coords = []
+        nan = (math.nan, math.nan)
+
+        for src, dst, style in links:
+            link = (src, dst, style)
+            if link in self.index_of:
+                continue
+            if style not in style_ids:
+                style_ids[style] = len(self.styles)
+                self.styles.append(style)
+                self.pens.append(link_pen(style))
+            index = self.index_of[link] = len(self.links)
+            self.links.append(link)
+            style_idx.append(style_ids[style])
+            coords.append(centers.get(src, nan) + centers.get(dst, nan))
+            self.by_page.setdefault(src, []).append(index)
+            self.by_page.setdefault(dst, []).append(index)
+
+        self.style_idx = np.concatenate(
+            [self.style_idx, np.array(style_idx, dtype=np.int32)]
+        )
+        self.coords = np.concatenate(
+            [self.coords, np.array(coords, dtype=np.float64).reshape(-1, 4)]
+        )
+        self.update_bounds()
+
+    def remove_links(self, links):
+        """Hide removed links. Their rows stay unused until the next set_links()."""
+        indices = []
+        for link in links:
+            index = self.index_of.pop(tuple(link), None)
+            if index is None:
+                continue
+            src, dst, _ = link
+            self.by_page[src].remove(index)
+            if dst != src:
+                self.by_page[dst].remove(index)
+            indices.append(index)
+
+        if indices:
+            self.coords[indices] = math.nan
+            self.update_bounds(indices)
+
+    def move_page(self, page_id, x, y):
+        """A page's centre moved (or was placed) at scene (x, y)."""
+        indices = self.by_page.get(page_id)
+        if not indices:
+            return
+        for index in indices:
+            src, dst, _ = self.links[index]
+            if src == page_id:
+                self.coords[index, 0:2] = (x, y)
+            if dst == page_id:
+                self.coords[index, 2:4] = (x, y)
+        self.update_bounds(indices)
+
+    def update_bounds(self, indices=None):
+        if indices is None:
+            x0, y0, x1, y1 = self.coords.T
+            self.bounds = np.stack(
+                [
+                    np.minimum(x0, x1),
+                    np.minimum(y0, y1),
+                    np.maximum(x0, x1),
+                    np.maximum(y0, y1),
+                ],
+                axis=1,
+            )
+            self.lengths = np.hypot(x1 - x0, y1 - y0)
+        else:
+            sub = self.coords[indices]
+            self.bounds[indices] = np.concatenate(
+                [
+                    np.minimum(sub[:, 0:2], sub[:, 2:4]),
+                    np.maximum(sub[:, 0:2], sub[:, 2:4]),
+                ],
+                axis=1,
+            )
+            self.lengths[indices] = np.hypot(
+                sub[:, 2] - sub[:, 0], sub[:, 3] - sub[:, 1]
+            )
+        self.cache = None  # Links changed; redraw the cached pixmap.
+
+    def visible(self, left, top, right, bottom, zoom):
+        """Edge indices to draw for a scene rectangle at a zoom, grouped by style."""
+        groups = {}
+        if len(self) and zoom >= EDGE_HIDE_ZOOM:
+            b = self.bounds
+            mask = (b[:, 0] <= right) & (b[:, 2] >= left)
+            mask &= (b[:, 1] <= bottom) & (b[:, 3] >= top)
+            mask &= self.lengths * zoom >= MIN_EDGE_PIXELS
+            indices = np.flatnonzero(mask)
+
+            if len(indices) > MAX_VISIBLE_EDGES:
+                indices = indices[:: math.ceil(len(indices) / MAX_VISIBLE_EDGES)]
+
+            styles = self.style_idx[indices]
+            for style in np.unique(styles):
+                groups[int(style)] = indices[styles == style]
+        return groups
+
+    def render(self, view_rect, zoom):
+        """Draw the links around view_rect (scene coordinates) into the cache."""
+        margin_x = view_rect.width() * CACHE_MARGIN
+        margin_y = view_rect.height() * CACHE_MARGIN
+        rect = view_rect.adjusted(-margin_x, -margin_y, margin_x, margin_y)
+
+        pixmap = QPixmap(
+            max(1, math.ceil(rect.width() * zoom)),
+            max(1, math.ceil(rect.height() * zoom)),
+        )
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(pixmap)
+        painter.scale(zoom, zoom)
+        painter.translate(-rect.left(), -rect.top())
+        groups = self.visible(
+            rect.left(), rect.top(), rect.right(), rect.bottom(), zoom
+        )
+        for style, indices in groups.items():
+            painter.setPen(self.pens[style])
+            painter.drawLines([QLineF(*row) for row in self.coords[indices].tolist()])
+        painter.end()
+
+        self.cache = pixmap
+        self.cache_rect = rect
+        self.cache_zoom = zoom
+
+    def paint(self, painter, exposed, view_rect, zoom):
+        """
+        Draw the links into the exposed scene rectangle, re-rendering the cache
+        only if the zoom changed or view_rect left the cached area.
+        """
+        if not len(self) or zoom < EDGE_HIDE_ZOOM:
+            return
+        if (
+            self.cache is None
+            or self.cache_zoom != zoom
+            or not self.cache_rect.contains(view_rect)
+        ):
+            self.render(view_rect, zoom)
+
+        source = QRectF(
+            (exposed.left() - self.cache_rect.left()) * zoom,
+            (exposed.top() - self.cache_rect.top()) * zoom,
+            exposed.width() * zoom,
+            exposed.height() * zoom,
+        )
+        painter.drawPixmap(exposed, self.cache, source)
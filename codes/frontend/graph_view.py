@@ -1,33 +1,166 @@
 # graph_view.py
 
+import math
 import sys
-import subprocess
+import time
 import pathlib
-import json
-from PyQt6.QtWidgets import QApplication, QWidget, QLabel, QPushButton, QTextBrowser
-from PyQt6.QtCore import Qt, QPoint, QPointF, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt6.QtGui import QPainter, QBrush, QPen, QFont, QMouseEvent
-import markdown
+from PyQt6.QtWidgets import (
+    QApplication,
+    QWidget,
+    QLabel,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QPushButton,
+    QTextBrowser,
+    QGraphicsScene,
+    QGraphicsView,
+)
+from PyQt6.QtCore import (
+    Qt,
+    pyqtSignal,
+    QPoint,
+    QPointF,
+    QRectF,
+    QTimer,
+    QPropertyAnimation,
+    QEasingCurve,
+    QFileSystemWatcher,
+)
+from PyQt6.QtGui import (
+    QPainter,
+    QBrush,
+    QPen,
+    QFont,
+    QMouseEvent,
+    QWheelEvent,
+    QTransform,
+    QPixmap,
+    QKeySequence,
+    QShortcut,
+)
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent / "backend"))
+from page_pool import PagePool
+from spatial_index import SpatialIndex
+from render_cache import RenderCache
+from page_loader import PageLoader, load_html
+from book_store import open_book
+from page_model import Page
+from page_style import StyleTable
+from edge_layer import EdgeLayer
+from page_thumbnails import ThumbnailCache
+from sqlite_book import SQLITE_NAME
+from autosave import AutoSaver
+from instrumentation import tracer
+from cache_manager import PAGE_BYTES, LINK_BYTES, SEARCH_PAGE_BYTES
 
 sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent.parent))
 from version import VERSION
 
-
-class MovableViewport(QWidget):
-    def __init__(self, book_name="Unknown Book"):
+PAGE_WIDTH = 256
+PAGE_HEIGHT = 192
+CULL_MARGIN = 200  # Pages this close to the screen edge are materialized early.
+POOL_SIZE = 64  # Fewest page widgets; resizeEvent() grows the pool to fit.
+LOAD_BATCH_SIZE = 256  # Loader results handed to the GUI thread per tick.
+LOAD_INTERVAL = 15  # Milliseconds between loader batches.
+SCENE_EXTENT = 10_000_000  # Half-size of the scene; large enough to never be hit.
+MIN_ZOOM = 0.05
+MAX_ZOOM = 4.0
+ZOOM_STEP = 1.15
+MIN_GRID_PIXELS = 8  # Zoomed out further, every other grid dot is skipped.
+
+# Level of detail: pages get live widgets only when readable. Below WIDGET_ZOOM
+# they are painted from cached snapshots, below THUMBNAIL_ZOOM as plain boxes,
+# and as dots once a box is smaller than DOT_PIXELS on screen.
+WIDGET_ZOOM = 0.6
+THUMBNAIL_ZOOM = 0.2
+DOT_PIXELS = 4
+THUMBNAILS_PER_FRAME = 24  # New snapshots rendered per paint; the rest follow.
+SEARCH_RESULTS = 10
+RELOAD_DELAY = 250  # Milliseconds of quiet on disk before the book is re-read.
+POLL_INTERVAL = 10_000  # Milliseconds between checks for pages edited in place.
+STATS_INTERVAL = 500  # Milliseconds between refreshes of the frame-time overlay.
+
+
+class MovableViewport(QGraphicsView):
+    closed = pyqtSignal()  # The window was closed and its book released.
+
+    def __init__(self, book_name="Unknown Book", virtualized=True):
         super().__init__()
         self.setWindowTitle(book_name)
         self.resize(800, 600)
         self.book_name = book_name
         self.setMouseTracking(True)
 
-        self.offset = QPointF(0, 0)
+        # Pages live in scene coordinates (x right, y down, origin at the
+        # page_location origin). Panning and zooming only change the single
+        # view transform; no page item is ever moved to follow the camera.
+        self.graph_scene = QGraphicsScene(self)
+        self.graph_scene.setSceneRect(
+            -SCENE_EXTENT, -SCENE_EXTENT, 2 * SCENE_EXTENT, 2 * SCENE_EXTENT
+        )
+        self.setScene(self.graph_scene)
+        self.setFrameShape(QGraphicsView.Shape.NoFrame)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.NoAnchor)
+        self.setResizeAnchor(QGraphicsView.ViewportAnchor.NoAnchor)
+        self.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        self.offset = QPointF(0, 0)  # Pan in screen pixels.
+        self.zoom = 1.0
         self.dragging = False
         self.last_mouse_pos = QPoint()
+        self.dragged_page = None  # Page being moved with the mouse.
+        self.drag_grab = QPointF()  # Where it was grabbed, from its top-left.
 
         self.grid_spacing = 50
-        self.dot_positions = {}
-        self.labels = []
+        self.grid_tile = None  # One grid cell, tiled by a brush across the view.
+
+        # Every page of the book, keyed by page_id; only the ones near the
+        # viewport get a widget from the pool.
+        self.virtualized = virtualized
+        self.pages = {}
+        self.index = SpatialIndex()
+        self.edges = EdgeLayer()
+        self.thumbnails = ThumbnailCache(PAGE_WIDTH, PAGE_HEIGHT)
+        self.book = None
+        self.book_path = None
+        self.saver = None  # Writes page moves and edits back in the background.
+        self.styles = StyleTable()
+        self.render_cache = None
+        self.search_index = None
+        self.pending_focus = None  # Page to centre on once it has been loaded.
+        self.load_started = None  # perf_counter() time of the running loadPages.
+        self.trimmed = False  # Caches dropped while hidden; see trim_caches().
+
+        # Pages are read and rendered by a background PageLoader; a timer moves
+        # finished results onto the scene in batches.
+        self.loader = None
+        self.load_timer = QTimer(self)
+        self.load_timer.setInterval(LOAD_INTERVAL)
+        self.load_timer.timeout.connect(self.drain_loader)
+        self.pool = PagePool(
+            self.create_page_widget, POOL_SIZE if virtualized else None
+        )
+
+        # Changes made on disk while the book is open (create_page.py, sync
+        # tools) are picked up once writes settle and patched in place.
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.schedule_reload)
+        self.watcher.fileChanged.connect(self.schedule_reload)
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY)
+        self.reload_timer.timeout.connect(self.reload_book)
+
+        # A page file rewritten in place (editors without atomic saves, sync
+        # clients) leaves the folder alone, so no watch fires for it; while a
+        # folder book is in view its files' stats are polled as well.
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_INTERVAL)
+        self.poll_timer.timeout.connect(self.poll_book)
 
         self.init_ui()
 
@@ -35,6 +168,17 @@ class MovableViewport(QWidget):
         self.version_text = QLabel(f"{VERSION}", self)
         self.version_text.setStyleSheet("color: gray; font-size: 10px;")
 
+        # Frame-time overlay, shown while instrumentation is recording (F3).
+        self.stats_text = QLabel(self)
+        self.stats_text.setStyleSheet("color: gray; font-size: 10px;")
+        self.stats_text.setVisible(tracer.enabled)
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(STATS_INTERVAL)
+        self.stats_timer.timeout.connect(self.update_stats_text)
+        if tracer.enabled:
+            self.stats_timer.start()
+        QShortcut(QKeySequence(Qt.Key.Key_F3), self, self.toggle_stats)
+
         self.coord_label = QLabel(self)
         self.coord_label.setStyleSheet(
             "color: white; background-color: black; padding: 2px; border-radius: 3px;"
@@ -68,62 +212,289 @@ class MovableViewport(QWidget):
         )
         self.book_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
+        self.search_field = QLineEdit(self)
+        self.search_field.setPlaceholderText("Search pages")
+        self.search_field.setStyleSheet(
+            "background-color: black; color: white; border: 1px solid white;"
+            " border-radius: 8px; padding: 4px;"
+        )
+        self.search_field.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
+        self.search_field.textChanged.connect(self.show_search_results)
+        self.search_field.returnPressed.connect(self.open_first_result)
+        QShortcut(QKeySequence.StandardKey.Find, self, self.search_field.setFocus)
+        QShortcut(
+            QKeySequence(Qt.Key.Key_Escape),
+            self.search_field,
+            self.search_field.clear,
+            context=Qt.ShortcutContext.WidgetShortcut,
+        )
+
+        self.search_results = QListWidget(self)
+        self.search_results.setStyleSheet(
+            "background-color: black; color: white; border: 1px solid white;"
+        )
+        self.search_results.hide()
+        self.search_results.itemClicked.connect(self.open_search_result)
+
         self.adjust_navbar()
+        self.adjust_search()
         self.update_version_position()
 
+    def drawBackground(self, painter, rect):
+        # The grid is one fill with a tiled brush in viewport pixels, offset by
+        # the pan and stretched to the zoomed spacing, so a repaint costs the
+        # same whatever the window size or the number of dots on screen.
+        spacing = self.grid_spacing * self.zoom
+        while spacing < MIN_GRID_PIXELS:
+            spacing *= 2
+        size = max(1, round(spacing))
+
+        origin = self.viewport_center() + self.offset  # Scene (0, 0) on screen.
+        brush_transform = QTransform.fromTranslate(origin.x(), origin.y())
+        brush_transform.scale(spacing / size, spacing / size)
+        brush = QBrush(self.grid_tile_pixmap(size))
+        brush.setTransform(brush_transform)
+
+        painter.save()
+        painter.resetTransform()
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+        painter.fillRect(self.mapFromScene(rect).boundingRect(), brush)
+        painter.restore()
+
+        self.edges.paint(painter, rect, self.visible_scene_rect(), self.zoom)
+
+        pen = QPen(Qt.GlobalColor.white, 2)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.drawPoint(QPointF(0, 0))
+
+    def drawForeground(self, painter, rect):
+        """
+        Zoomed out, pages are painted here instead of getting widgets. Zoomed
+        in, so are pages left without one (pages stacked on top of each other
+        can outnumber the pool).
+        """
+        if not self.virtualized:
+            return
+
+        page_ids = self.pages_in_rect(rect)
+        if self.zoom >= WIDGET_ZOOM:
+            page_ids = [page_id for page_id in page_ids if page_id not in self.pool]
+            if not page_ids:
+                return
+        if self.zoom >= THUMBNAIL_ZOOM:
+            page_ids = self.paint_thumbnails(painter, page_ids)
+        self.paint_boxes(painter, page_ids)
+
+    def paint_thumbnails(self, painter, page_ids):
+        """Paint cached snapshots; returns the pages that still need a box."""
+        missing = []
+        budget = THUMBNAILS_PER_FRAME
+        for rank, page_id in enumerate(page_ids):
+            page = self.pages[page_id]
+            pixmap = self.thumbnails.get(page)
+            if pixmap is None:
+                if page.html is None:
+                    self.render_page(page_id, rank)
+                elif budget > 0:
+                    pixmap = self.thumbnails.render(page)
+                    budget -= 1
+                    tracer.count("thumbnails rendered")
+
+            if pixmap is None:
+                missing.append(page_id)
+            else:
+                painter.drawPixmap(
+                    QRectF(page.x, -page.y, PAGE_WIDTH, PAGE_HEIGHT),
+                    pixmap,
+                    QRectF(pixmap.rect()),
+                )
+
+        if budget <= 0:
+            QTimer.singleShot(0, self.viewport().update)  # Finish next frame.
+        return missing
+
+    def paint_boxes(self, painter, page_ids):
+        """Paint pages as boxes (or dots) in their style colours, one call per style."""
+        as_dots = PAGE_WIDTH * self.zoom < DOT_PIXELS
+        shapes = {}
+        for page_id in page_ids:
+            page = self.pages[page_id]
+            if as_dots:
+                shape = QPointF(page.x + PAGE_WIDTH / 2, -page.y + PAGE_HEIGHT / 2)
+            else:
+                shape = QRectF(page.x, -page.y, PAGE_WIDTH, PAGE_HEIGHT)
+            shapes.setdefault(page.style, []).append(shape)
+
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        for style, group in shapes.items():
+            brush, pen = self.thumbnails.box_paint(style)
+            if as_dots:
+                dot_pen = QPen(pen.color(), DOT_PIXELS)
+                dot_pen.setCosmetic(True)
+                painter.setPen(dot_pen)
+                painter.drawPoints(group)
+            else:
+                painter.setPen(pen)
+                painter.setBrush(brush)
+                painter.drawRects(group)
+
+    def grid_tile_pixmap(self, size):
+        """A size x size black cell with a grid dot in its corner, cached by size."""
+        if self.grid_tile is None or self.grid_tile.width() != size:
+            tile = QPixmap(size, size)
+            tile.fill(Qt.GlobalColor.black)
+            tile_painter = QPainter(tile)
+            tile_painter.setPen(QPen(Qt.GlobalColor.darkGray, 1))
+            tile_painter.drawPoint(0, 0)
+            tile_painter.end()
+            self.grid_tile = tile
+        return self.grid_tile
+
     def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.fillRect(self.rect(), QBrush(Qt.GlobalColor.black))
-
-        center_x = self.width() // 2 + int(self.offset.x())
-        center_y = self.height() // 2 + int(self.offset.y())
-
-        self.dot_positions.clear()
-        for x in range(
-            (center_x % self.grid_spacing) - self.grid_spacing,
-            self.width(),
-            self.grid_spacing,
-        ):
-            for y in range(
-                (center_y % self.grid_spacing) - self.grid_spacing,
-                self.height(),
-                self.grid_spacing,
-            ):
-                painter.setPen(QPen(Qt.GlobalColor.darkGray, 1))
-                painter.drawPoint(QPoint(x, y))
+        if not tracer.enabled:
+            super().paintEvent(event)
+            return
 
-        painter.setPen(QPen(Qt.GlobalColor.white, 2))
-        painter.drawPoint(QPoint(center_x, center_y))
+        start = time.perf_counter()
+        super().paintEvent(event)
+        tracer.frame(start, time.perf_counter() - start)
 
     def mouseMoveEvent(self, event: QMouseEvent):
-        if self.dragging:
-            delta = event.pos() - self.last_mouse_pos
-            self.offset += QPointF(delta.x(), delta.y())
-            self.last_mouse_pos = event.pos()
-            for label, rel_pos in self.labels:
-                label.move((self.offset + rel_pos).toPoint())
-            self.update()
+        with tracer.timer("mouseMoveEvent"):
+            if self.dragged_page is not None:
+                top_left = self.scene_pos(event.position()) - self.drag_grab
+                self.move_page(
+                    self.dragged_page, round(top_left.x()), round(-top_left.y())
+                )
+            elif self.dragging:
+                delta = event.pos() - self.last_mouse_pos
+                self.offset += QPointF(delta.x(), delta.y())
+                self.last_mouse_pos = event.pos()
+                self.apply_transform()
+            else:
+                super().mouseMoveEvent(event)
 
     def mousePressEvent(self, event: QMouseEvent):
-        if event.button() == Qt.MouseButton.LeftButton:
+        # Presses on a page go to its widget, unless the page is only painted
+        # (zoomed out) or Shift is held: then they drag the page. Presses on
+        # the canvas pan.
+        if event.button() != Qt.MouseButton.LeftButton:
+            super().mousePressEvent(event)
+            return
+
+        page_id = self.page_at(event.position())
+        if page_id is not None and (
+            self.zoom < WIDGET_ZOOM
+            or event.modifiers() & Qt.KeyboardModifier.ShiftModifier
+        ):
+            page = self.pages[page_id]
+            self.dragged_page = page_id
+            self.drag_grab = self.scene_pos(event.position()) - QPointF(page.x, -page.y)
+        elif self.itemAt(event.pos()) is None:
             self.dragging = True
             self.last_mouse_pos = event.pos()
+        else:
+            super().mousePressEvent(event)
 
     def mouseReleaseEvent(self, event: QMouseEvent):
-        if event.button() == Qt.MouseButton.LeftButton:
+        if event.button() == Qt.MouseButton.LeftButton and (
+            self.dragging or self.dragged_page is not None
+        ):
             self.dragging = False
+            self.dragged_page = None
+        else:
+            super().mouseReleaseEvent(event)
+
+    def wheelEvent(self, event: QWheelEvent):
+        if self.itemAt(event.position().toPoint()) is not None:
+            super().wheelEvent(event)  # Let the page scroll its own content.
+            return
+
+        steps = event.angleDelta().y() / 120
+        self.zoom_by(ZOOM_STEP**steps, event.position())
+
+    def zoom_by(self, factor, anchor=None):
+        """Zoom around anchor (viewport coordinates), keeping it fixed on screen."""
+        if anchor is None:
+            anchor = QPointF(self.viewport().rect().center())
+
+        scene_anchor = self.scene_pos(anchor)
+        self.zoom = min(MAX_ZOOM, max(MIN_ZOOM, self.zoom * factor))
+        self.offset = anchor - self.viewport_center() - scene_anchor * self.zoom
+        self.apply_transform()
+
+    def viewport_center(self):
+        return QPointF(self.viewport().width() / 2, self.viewport().height() / 2)
+
+    def scene_pos(self, view_pos):
+        """Map a viewport position to scene coordinates using offset and zoom."""
+        return (QPointF(view_pos) - self.viewport_center() - self.offset) / self.zoom
+
+    def apply_transform(self):
+        """Push offset and zoom into the view transform: O(1) per pan or zoom."""
+        self.setTransform(QTransform.fromScale(self.zoom, self.zoom))
+        self.centerOn(-self.offset / self.zoom)
+        self.update_visible_pages()
 
     def resizeEvent(self, event):
         self.adjust_navbar()
+        self.adjust_search()
         self.update_version_position()
         super().resizeEvent(event)
+        if self.virtualized:
+            self.pool.capacity = self.pool_size()
+        self.apply_transform()
+
+    def pool_size(self):
+        """Widgets for a viewport (plus cull margin) tiled with pages at WIDGET_ZOOM."""
+        width = self.viewport().width() + 2 * CULL_MARGIN
+        height = self.viewport().height() + 2 * CULL_MARGIN
+        columns = math.ceil(width / (PAGE_WIDTH * WIDGET_ZOOM)) + 1
+        rows = math.ceil(height / (PAGE_HEIGHT * WIDGET_ZOOM)) + 1
+        return max(POOL_SIZE, columns * rows)
 
     def adjust_navbar(self):
         self.navbar.setGeometry(0, 0, self.width(), 40)
         self.back_button.move(10, 5)
         self.book_label.setGeometry((self.width() // 2) - 100, 5, 200, 30)
 
+    def adjust_search(self):
+        self.search_field.setGeometry(self.width() - 260, 5, 250, 30)
+        self.search_results.setGeometry(self.width() - 260, 40, 250, 200)
+
+    def show_search_results(self):
+        self.search_results.clear()
+        hits = []
+        if self.search_index is not None:
+            hits = self.search_index.search(self.search_field.text(), SEARCH_RESULTS)
+        for page_id, title, _ in hits:
+            item = QListWidgetItem(title or page_id)
+            item.setData(Qt.ItemDataRole.UserRole, page_id)
+            self.search_results.addItem(item)
+        self.search_results.setVisible(bool(hits))
+
+    def open_first_result(self):
+        if self.search_results.count():
+            self.open_search_result(self.search_results.item(0))
+
+    def open_search_result(self, item):
+        self.search_results.hide()
+        self.focus_page(item.data(Qt.ItemDataRole.UserRole))
+
+    def focus_page(self, page_id):
+        """Centre the view on a page, at a zoom where it is readable."""
+        if page_id not in self.pages:
+            self.pending_focus = page_id  # Centred by add_page once it arrives.
+            return
+
+        self.pending_focus = None
+        if self.zoom < WIDGET_ZOOM:
+            self.zoom = 1.0
+        x, y = self.page_center(self.pages[page_id])
+        self.offset = QPointF(-x, -y) * self.zoom
+        self.apply_transform()
+
     def show_navbar(self):
         if not self.navbar_visible:
             self.navbar_visible = True
@@ -144,54 +515,411 @@ class MovableViewport(QWidget):
             self.width() - self.version_text.width() - 5,
             self.height() - self.version_text.height() - 5,
         )
+        self.stats_text.adjustSize()
+        self.stats_text.move(
+            self.version_text.x() - self.stats_text.width() - 10,
+            self.version_text.y(),
+        )
+
+    def toggle_stats(self):
+        """Start or stop recording, showing the overlay while it runs."""
+        if tracer.enabled:
+            tracer.disable()
+            self.stats_timer.stop()
+            self.stats_text.hide()
+            self.export_trace()
+        else:
+            tracer.enable()
+            self.stats_timer.start()
+            self.stats_text.show()
+            self.update_stats_text()
+
+    def update_stats_text(self):
+        fps, p50, p99 = tracer.frame_stats()
+        self.stats_text.setText(
+            f"{fps:.0f} fps  p50 {p50:.1f} ms  p99 {p99:.1f} ms"
+            f"  {len(self.pool)} widgets"
+        )
+        self.update_version_position()
+
+    def export_trace(self):
+        path = tracer.export(
+            label=self.book_name,
+            metadata={"version": VERSION, "book": self.book_name},
+        )
+        if path is not None:
+            print(f"Trace saved to {path}")
+
+    def closeEvent(self, event):
+        self.cancel_loading()
+        self.close_book()
+        if tracer.enabled:
+            self.export_trace()
+        super().closeEvent(event)
+        self.closed.emit()
 
     def open_start_view(self):
-        subprocess.Popen(["python3", "start_view.py"])
-        self.close()
+        # The view is only hidden: it stays loaded (and watched) so that
+        # reopening the book from the start window is instant.
+        from navigator import get_navigator
+
+        get_navigator().show_start(self)
 
     def loadPages(self, book_name):
+        """Start loading a book in the background and return immediately."""
         book_path = pathlib.Path(f"../../storage/bag/{book_name}")
         if not book_path.exists():
             return
 
-        center_x = self.width() // 2
-        center_y = self.height() // 2
-
-        for page in book_path.glob("*.json"):
-            with page.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            pos = data.get("page_location", {"x": 0, "y": 0})
-            style = data.get("page_style", {})
-            raw_content = data.get("page_content", "")
+        self.load_started = time.perf_counter()
+        self.cancel_loading()
+        self.pool.release_all()
+        self.pages.clear()
+        self.index.clear()
+        self.edges.clear()
+        self.thumbnails.clear()
+        self.close_book()
+        self.book = open_book(book_path)
+        self.book_path = book_path
+        self.saver = AutoSaver(self.book)
+        self.watch_book()
+        if self.book.backend == "folder":
+            self.poll_timer.start()
+        self.styles = StyleTable.load(book_path)
+        self.render_cache = RenderCache(book_name)
+        self.search_index = None  # Attached once the loader has read it.
+
+        self.loader = PageLoader(self.book, self.render_cache)
+        self.loader.load_book(search=True)
+        self.load_timer.start()
+        self.viewport().update()
+        tracer.add(
+            "loadPages", self.load_started, time.perf_counter() - self.load_started
+        )
 
-            # If content is double-encoded JSON string
-            if isinstance(raw_content, str):
-                try:
-                    raw_content = json.loads(raw_content)
-                except json.JSONDecodeError:
-                    pass
+    def close_book(self):
+        watched = self.watcher.files() + self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self.reload_timer.stop()
+        self.poll_timer.stop()
+        if self.render_cache is not None:
+            self.render_cache.save()
+        if self.saver is not None:
+            self.saver.close()
+            self.saver = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+
+    def memory_usage(self):
+        """Approximate bytes held for this book, per kind (see CacheManager)."""
+        if self.trimmed:
+            return {"manifest": len(self.pages) * PAGE_BYTES}
+        return {
+            "manifest": len(self.pages) * PAGE_BYTES,
+            "pages": sum(len(page.html) for page in self.pages.values() if page.html),
+            "html": self.render_cache.size if self.render_cache is not None else 0,
+            "pixmaps": self.thumbnails.used,
+            "links": self.edges.coords.nbytes * 3 + len(self.edges) * LINK_BYTES,
+            "search": len(self.search_index or ()) * SEARCH_PAGE_BYTES,
+        }
+
+    def trim_caches(self):
+        """
+        Drop everything of a hidden book but its pages' index entries: renders,
+        snapshots, widgets, links and the search index. showEvent() brings
+        them back. Returns False if the book is still loading.
+        """
+        if self.trimmed or self.loader is None or not self.loader.listed.is_set():
+            return False
+
+        # Unwatched while trimmed; the reload on show catches up with disk.
+        watched = self.watcher.files() + self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self.reload_timer.stop()
+
+        self.pool.release_all()
+        for page in self.pages.values():
+            page.html = None
+            page.render_queued = False
+        self.thumbnails.clear()
+        self.render_cache.trim(0)
+        self.edges.clear()
+        self.loader.forget_links()
+        self.book.release_links()
+        search_index = self.loader.drop_search()
+        if search_index is not None:
+            search_index.save()
+        self.search_index = None
+        self.trimmed = True
+        return True
+
+    def shrink_caches(self):
+        """Halve the caches of a book in view, keeping what is on screen."""
+        self.thumbnails.clear()
+        if self.render_cache is not None:
+            self.render_cache.trim(self.render_cache.size // 2)
+        for page_id, page in self.pages.items():
+            if page_id not in self.pool:
+                page.html = None
+                page.render_queued = False
+
+    def showEvent(self, event):
+        if self.trimmed:
+            self.trimmed = False
+            self.loader.resume_search()
+            self.watch_book()
+            self.loader.reload()  # Resends every link, and what changed on disk.
+            self.load_timer.start()
+            self.render_cache.load()  # Trimmed renders are still on disk.
+            self.update_visible_pages()  # Rebinds widgets; queues the renders.
+            self.viewport().update()
+        super().showEvent(event)
+
+    def watch_book(self):
+        """Watch the book folder, plus the files that change without touching it."""
+        watched = set(self.watcher.files() + self.watcher.directories())
+        paths = [self.book_path] + [
+            self.book_path / name
+            for name in ("links.csv", SQLITE_NAME, f"{SQLITE_NAME}-wal")
+            if (self.book_path / name).exists()
+        ]
+        missing = [str(path) for path in paths if str(path) not in watched]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def schedule_reload(self, path=None):
+        self.reload_timer.start()  # Restarting the timer coalesces bursts.
+
+    def poll_book(self):
+        if self.isVisible() and self.loader is not None and not self.loader.busy():
+            self.reload_book()
+
+    def reload_book(self):
+        if self.loader is None:
+            return
+        if not self.loader.listed.is_set():
+            self.reload_timer.start()  # Still loading; look again later.
+            return
 
-            content_render = markdown.markdown(raw_content)
+        self.watch_book()  # Files replaced by a rename drop out of the watch.
+        self.loader.reload()
+        self.load_timer.start()
 
-            label = QTextBrowser(self)
-            label.setHtml(content_render)
-            label.setOpenExternalLinks(True)
+    def cancel_loading(self):
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+        self.load_timer.stop()
 
-            style_string = "; ".join(
-                f"{k.replace('_', '-')}: {v}" for k, v in style.items()
-            )
-            label.setStyleSheet(style_string)
-            label.adjustSize()
+    def drain_loader(self):
+        """GUI stage: apply one batch of finished reads and renders."""
+        if self.loader is None:
+            self.load_timer.stop()
+            return
 
-            x = center_x + pos.get("x", 0)
-            y = center_y - pos.get("y", 0)
-            label.move(x, y)
-            label.show()
+        added = snapshots_ready = False
+        for kind, page_id, payload in self.loader.drain(LOAD_BATCH_SIZE):
+            if kind == "page":
+                if page_id in self.pages:
+                    self.update_page(page_id, payload)
+                else:
+                    self.add_page(page_id, payload)
+                added = True
+            elif kind == "removed":
+                self.remove_page(page_id)
+                added = True
+            elif kind == "links changed":
+                links_added, links_removed = payload
+                self.edges.remove_links(links_removed)
+                self.edges.add_links(
+                    links_added,
+                    {
+                        page_id: self.page_center(self.pages[page_id])
+                        for link in links_added
+                        for page_id in link[:2]
+                        if page_id in self.pages
+                    },
+                )
+                self.viewport().update()
+            elif kind == "search":
+                if not self.trimmed:
+                    self.search_index = payload
+                    if self.search_field.text():
+                        self.show_search_results()
+            elif kind == "links":
+                self.edges.set_links(
+                    payload,
+                    {
+                        page_id: self.page_center(page)
+                        for page_id, page in self.pages.items()
+                    },
+                )
+                self.viewport().update()
+            elif page_id in self.pages and self.pages[page_id].hash == payload[0]:
+                html = self.pages[page_id].html = payload[1]
+                if page_id in self.pool:
+                    self.pool.active[page_id].widget().setHtml(html)
+                else:
+                    snapshots_ready = True
+
+        if added:
+            self.update_visible_pages()
+        if snapshots_ready or (added and self.zoom < WIDGET_ZOOM):
+            self.viewport().update()
+        if not self.loader.busy():
+            self.load_timer.stop()
+            if self.load_started is not None:
+                # Background part of loadPages: until every page is placed.
+                tracer.add(
+                    "loadPages (background)",
+                    self.load_started,
+                    time.perf_counter() - self.load_started,
+                )
+                self.load_started = None
+
+    def add_page(self, page_id, entry):
+        """Place a page from its index entry; its body is read when shown."""
+        page = self.pages[page_id] = Page.from_entry(entry, self.styles)
+        self.index.insert(page_id, page.x, -page.y, PAGE_WIDTH, PAGE_HEIGHT)
+        if len(self.edges):
+            self.edges.move_page(page_id, *self.page_center(page))
+        if page_id == self.pending_focus:
+            self.focus_page(page_id)
+
+    def update_page(self, page_id, entry):
+        """Patch a page that changed on disk, keeping the rest of the scene."""
+        if self.saver is not None and self.saver.is_dirty(page_id):
+            return  # Edited here since; the pending save wins.
+
+        old = self.pages[page_id]
+        page = Page.from_entry(entry, self.styles)
+        if (page.x, page.y, page.title, page.style, page.hash) == (
+            old.x,
+            old.y,
+            old.title,
+            old.style,
+            old.hash,
+        ):
+            return  # Our own save coming back from the watcher.
 
-            self.labels.append((label, QPointF(x, y)))
+        self.pages[page_id] = page
+        if page.hash == old.hash:
+            page.html, page.render_queued = old.html, old.render_queued
+        self.index.move(page_id, page.x, -page.y, PAGE_WIDTH, PAGE_HEIGHT)
+        self.edges.move_page(page_id, *self.page_center(page))
+        self.pool.release(page_id)  # Rebound with the new content and style.
 
-        self.update()
+    def remove_page(self, page_id):
+        if page_id not in self.pages:
+            return
+        self.pool.release(page_id)
+        self.index.remove(page_id)
+        del self.pages[page_id]
+        self.edges.move_page(page_id, math.nan, math.nan)  # Hide its links.
+        if self.dragged_page == page_id:
+            self.dragged_page = None  # Deleted on disk mid-drag.
+
+    def page_center(self, page):
+        """Scene position where links attach to a page."""
+        return (page.x + PAGE_WIDTH / 2, -page.y + PAGE_HEIGHT / 2)
+
+    def create_page_widget(self):
+        label = QTextBrowser()
+        label.setOpenExternalLinks(True)
+        label.resize(PAGE_WIDTH, PAGE_HEIGHT)
+        proxy = self.graph_scene.addWidget(label)
+        proxy.page_style = None  # The Style whose stylesheet the label has.
+        proxy.hide()
+        return proxy
+
+    def render_page(self, page_id, priority=0):
+        """
+        HTML for a page if it is ready. Otherwise queue it on the loader and
+        return an empty placeholder that drain_loader fills in later.
+        """
+        page = self.pages[page_id]
+        if page.html is not None:
+            return page.html
+
+        if self.loader is None:
+            page.html = load_html(self.render_cache, self.book, page_id, page.hash)
+            return page.html
+
+        if not page.render_queued:
+            page.render_queued = True
+            self.loader.render(page_id, page.hash, priority)
+            self.load_timer.start()
+        return ""
+
+    def visible_scene_rect(self, margin=0):
+        """The scene rectangle currently on screen, grown by margin pixels."""
+        margin /= self.zoom
+        return QRectF(
+            self.scene_pos(QPointF(0, 0)),
+            self.scene_pos(QPointF(self.viewport().width(), self.viewport().height())),
+        ).adjusted(-margin, -margin, margin, margin)
+
+    def pages_in_rect(self, rect):
+        return self.index.query(rect.left(), rect.top(), rect.right(), rect.bottom())
+
+    def page_at(self, view_pos):
+        """Id of the page under a viewport position, whether or not it has a widget."""
+        point = self.scene_pos(view_pos)
+        return self.index.at(point.x(), point.y())
+
+    def move_page(self, page_id, x, y):
+        """Move a page to page_location (x, y), keeping the index and widget in sync."""
+        page = self.pages[page_id]
+        page.x, page.y = x, y
+        self.index.move(page_id, x, -y, PAGE_WIDTH, PAGE_HEIGHT)
+        if page_id in self.pool:
+            self.pool.active[page_id].setPos(QPointF(x, -y))
+        self.edges.move_page(page_id, *self.page_center(page))
+        if self.saver is not None:
+            self.saver.mark(page_id, page_location={"x": x, "y": y})
+        self.update_visible_pages()
+        self.viewport().update()
+
+    def visible_page_ids(self):
+        """Ids of the pages intersecting the viewport plus margin, closest first."""
+        if not self.virtualized:
+            return list(self.pages)
+        if self.zoom < WIDGET_ZOOM:
+            return []  # Painted by drawForeground instead.
+
+        view = self.visible_scene_rect(CULL_MARGIN)
+        cx, cy = view.center().x(), view.center().y()
+
+        def distance(page_id):
+            left, top, right, bottom = self.index.rect(page_id)
+            return abs((left + right) / 2 - cx) + abs((top + bottom) / 2 - cy)
+
+        return sorted(self.pages_in_rect(view), key=distance)
+
+    def update_visible_pages(self):
+        """Bind pooled widgets to the pages on screen and recycle the rest."""
+        for rank, page_id in enumerate(self.pool.sync(self.visible_page_ids())):
+            proxy = self.pool.acquire(page_id)
+            if proxy is None:
+                tracer.count("pool exhausted")
+                break  # Pool exhausted; the closest pages already have widgets.
+
+            page = self.pages[page_id]
+            label = proxy.widget()
+            label.setHtml(self.render_page(page_id, rank))
+
+            # Pages share interned styles, so a recycled label usually already
+            # has the right stylesheet and Qt has nothing to recompute.
+            if proxy.page_style is not page.style:
+                with tracer.timer("setStyleSheet"):
+                    label.setStyleSheet(page.style.stylesheet)
+                proxy.page_style = page.style
+
+            proxy.setPos(QPointF(page.x, -page.y))
+            proxy.show()
 
 
 if __name__ == "__main__":
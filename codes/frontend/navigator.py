@@ -0,0 +1,112 @@
+# navigator.py
+
+from collections import OrderedDict
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+from cache_manager import CacheManager
+
+WARM_BOOKS = 32  # Graph views kept open in the background, most recent first.
+ENFORCE_INTERVAL = 2000  # Milliseconds between checks of the memory budget.
+START_WINDOW = "/start"  # Cache manager name of the start window; no book's.
+
+
+class Navigator:
+    """
+    Switches between the start window and graph views in one QApplication.
+
+    Leaving a book hides its MovableViewport instead of closing it, so the
+    book stays open and reopening it is instant. Every open book's caches
+    share one memory budget through a CacheManager: hidden books are trimmed
+    to their manifest, and closed, least recently used first, when the
+    budget runs out. The start window's search indexes count against the
+    same budget. The oldest hidden views are also closed once there are
+    more than WARM_BOOKS of them. Everything still open is closed (and its
+    pending edits saved) when the application quits.
+    """
+
+    def __init__(self, warm_books=WARM_BOOKS, budget=None):
+        self.warm_books = warm_books
+        self.start_window = None
+        self.views = OrderedDict()  # book_name -> MovableViewport, oldest first.
+        self.caches = CacheManager(budget)
+        self.enforce_timer = QTimer()
+        self.enforce_timer.setInterval(ENFORCE_INTERVAL)
+        self.enforce_timer.timeout.connect(self.caches.enforce)
+        self.enforce_timer.start()
+        QApplication.instance().aboutToQuit.connect(self.close_all)
+
+    def show_start(self, view=None):
+        """Show the start window, hiding view (which stays warm)."""
+        from start_view import StartWindow
+
+        if view is not None:
+            self.adopt(view)
+            view.hide()
+        if self.start_window is None:
+            self.start_window = StartWindow()
+            self.caches.register(START_WINDOW, self.start_window, closable=False)
+        self.caches.touch(START_WINDOW)
+        self.start_window.show()
+        self.start_window.raise_()
+        self.trim()
+
+    def open_book(self, book_name, page_id=None):
+        """Show the graph view of a book, reusing a warm one if there is one."""
+        from graph_view import MovableViewport
+
+        view = self.views.get(book_name)
+        if view is None:
+            view = MovableViewport(book_name)
+            view.loadPages(book_name)
+            self.adopt(view)
+        self.views.move_to_end(book_name)
+        self.caches.touch(book_name)
+
+        view.show()
+        view.raise_()
+        view.activateWindow()
+        if page_id is not None:
+            view.focus_page(page_id)
+        if self.start_window is not None:
+            self.start_window.hide()
+        self.trim()
+        return view
+
+    def adopt(self, view):
+        if self.views.get(view.book_name) is view:
+            return
+        self.views[view.book_name] = view
+        self.caches.register(view.book_name, view)
+        view.closed.connect(lambda view=view: self.forget(view))
+
+    def forget(self, view):
+        """Drop a view the user closed; it has already released its book."""
+        if self.views.get(view.book_name) is view:
+            del self.views[view.book_name]
+        self.caches.unregister(view.book_name, view)
+
+    def trim(self):
+        """Close the least recently used hidden views beyond the limits."""
+        hidden = [name for name, view in self.views.items() if not view.isVisible()]
+        for name in hidden[: max(0, len(hidden) - self.warm_books)]:
+            view = self.views.pop(name)
+            view.close()
+            view.deleteLater()
+        self.caches.enforce()
+
+    def close_all(self):
+        self.enforce_timer.stop()
+        while self.views:
+            _, view = self.views.popitem(last=False)
+            view.close()
+
+
+navigator = None
+
+
+def get_navigator():
+    """The application's navigator, created on first use."""
+    global navigator
+    if navigator is None:
+        navigator = Navigator()
+    return navigator
@@ -0,0 +1,189 @@
+# page_loader.py
+
+import itertools
+import os
+import queue
+import threading
+from search_index import SearchIndex
+
+WORKERS = min(4, os.cpu_count() or 1)
+
+# Tasks are ordered by (stage, priority): renders requested for on-screen pages
+# run before the remaining file reads, closest to the viewport first.
+RENDER_STAGE = 0
+READ_STAGE = 1
+
+
+def load_html(render_cache, book, page_id, key):
+    """HTML for a page, reading its body from the book only if key is not cached."""
+    html = render_cache.lookup(key)
+    if html is None:
+        data = book.read_page(page_id)
+        html = render_cache.get(data.get("page_content", ""))
+    return html
+
+
+class PageLoader:
+    """
+    Background stage of page loading.
+
+    Worker threads list the book's pages from its index (the manifest, or the
+    SQLite pages table), then read and render page bodies only for pages that
+    are actually shown. Results are queued as
+    (kind, page_id, payload) tuples for the GUI thread to collect in batches
+    with drain(), so the window stays responsive while the book fills in. The
+    book's search index is loaded last, on a worker as well, and handed over
+    as a "search" result. A loader is single-use: cancel() stops it for good.
+    """
+
+    def __init__(self, book, render_cache, workers=WORKERS):
+        self.book = book
+        self.render_cache = render_cache
+        self.tasks = queue.PriorityQueue()
+        self.results = queue.SimpleQueue()
+        self.counter = itertools.count()  # Tie-breaker keeping FIFO order.
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.search = False  # Whether to keep a search index for the book.
+        self.search_index = None  # Loaded after the book is listed.
+        self.search_lock = threading.Lock()
+
+        # What the GUI was sent, so reload() can send only the differences.
+        self.entries = {}  # page_id -> index entry.
+        self.link_set = set()
+        self.listed = threading.Event()  # Set once pages and links were sent.
+        self.reload_lock = threading.Lock()
+
+        self.threads = [
+            threading.Thread(target=self.work, daemon=True) for _ in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, stage, priority, fn, *args):
+        with self.lock:
+            self.pending += 1
+        self.tasks.put(((stage, priority), next(self.counter), fn, args))
+
+    def work(self):
+        while True:
+            _, _, fn, args = self.tasks.get()
+            if fn is None:
+                return  # Sentinel from cancel().
+
+            try:
+                if not self.cancelled.is_set():
+                    result = fn(*args)
+                    if result is not None and not self.cancelled.is_set():
+                        self.results.put(result)
+            except (OSError, ValueError, KeyError):
+                pass  # Unreadable, malformed or deleted pages are skipped.
+            finally:
+                with self.lock:
+                    self.pending -= 1
+
+    def busy(self):
+        with self.lock:
+            return self.pending > 0 or not self.results.empty()
+
+    def load_book(self, search=False):
+        self.search = search
+        self.submit(READ_STAGE, 0, self.list_pages)
+
+    def list_pages(self):
+        # One index read lays out the whole book; page bodies stay on disk.
+        for page in self.book.pages():
+            if self.cancelled.is_set():
+                return
+            self.entries[page["page_id"]] = page
+            self.results.put(("page", page["page_id"], page))
+
+        # Queued only now, so the GUI places every page before the links.
+        self.submit(READ_STAGE, 0, self.list_links)
+        if self.search:
+            self.submit(READ_STAGE, 1, self.update_search)
+
+    def list_links(self):
+        links = list(self.book.links())
+        self.link_set = set(links)
+        self.listed.set()
+        return ("links", None, links)
+
+    def update_search(self):
+        # Last in line: the saved index is loaded the first time, after that
+        # only pages edited since it was saved are read.
+        with self.search_lock:
+            search_index = self.search_index
+            if search_index is None:
+                search_index = SearchIndex(self.book.book_path)
+                if not self.search or self.cancelled.is_set():
+                    return  # Dropped while it was loading.
+                self.search_index = search_index
+                self.results.put(("search", None, search_index))
+            search_index.update(self.book, self.cancelled)
+
+    def resume_search(self):
+        """Keep a search index again after drop_search(); reload() loads it."""
+        self.search = True
+
+    def drop_search(self):
+        """Stop keeping the search index; returns it (or None) to be saved."""
+        self.search = False
+        search_index, self.search_index = self.search_index, None
+        return search_index
+
+    def reload(self):
+        """Re-list the book and queue what changed since it was last listed."""
+        self.submit(READ_STAGE, 0, self.reload_book)
+
+    def reload_book(self):
+        # The book's own indexes do the change detection: the manifest only
+        # re-parses files whose mtime or size moved (checked file by file, as
+        # a page edited in place leaves the folder's mtime alone), and the link
+        # journal is only read past what was already replayed.
+        with self.reload_lock:
+            entries = {page["page_id"]: page for page in self.book.pages(deep=True)}
+            for page_id, page in entries.items():
+                if self.entries.get(page_id) != page:
+                    self.results.put(("page", page_id, page))
+            for page_id in self.entries.keys() - entries.keys():
+                self.results.put(("removed", page_id, None))
+            self.entries = entries
+
+            links = set(self.book.links())
+            added = list(links - self.link_set)
+            removed = list(self.link_set - links)
+            self.link_set = links
+            if added or removed:
+                self.results.put(("links changed", None, (added, removed)))
+
+        if self.search:
+            self.submit(READ_STAGE, 1, self.update_search)
+
+    def forget_links(self):
+        """Drop the sent links; the next reload() sends them all again."""
+        with self.reload_lock:
+            self.link_set = set()
+
+    def render(self, page_id, key, priority=0):
+        self.submit(RENDER_STAGE, priority, self.render_page, page_id, key)
+
+    def render_page(self, page_id, key):
+        html = load_html(self.render_cache, self.book, page_id, key)
+        return ("html", page_id, (key, html))
+
+    def drain(self, limit):
+        """Collect up to limit finished results without blocking."""
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def cancel(self):
+        self.cancelled.set()
+        for _ in self.threads:
+            self.tasks.put(((-1, 0), next(self.counter), None, ()))
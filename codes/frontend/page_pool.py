@@ -0,0 +1,58 @@
+# page_pool.py
+
+
+class PagePool:
+    """
+    Fixed-size pool of page widgets that are recycled as pages scroll in and out
+    of view, so the number of live widgets depends on the screen, not the book.
+    """
+
+    def __init__(self, factory, capacity=64):
+        self.factory = factory  # Callable creating a new, hidden page widget.
+        self.capacity = capacity  # None means the pool may grow without limit.
+        self.free = []
+        self.active = {}  # page_id -> widget currently showing that page.
+
+    def __contains__(self, page_id):
+        return page_id in self.active
+
+    def __len__(self):
+        return len(self.active)
+
+    def items(self):
+        return self.active.items()
+
+    def acquire(self, page_id):
+        """Return a widget for page_id, or None when the pool is exhausted."""
+        if page_id in self.active:
+            return self.active[page_id]
+
+        if self.free:
+            widget = self.free.pop()
+        elif self.capacity is None or len(self.active) < self.capacity:
+            widget = self.factory()
+        else:
+            return None
+
+        self.active[page_id] = widget
+        return widget
+
+    def release(self, page_id):
+        widget = self.active.pop(page_id, None)
+        if widget is not None:
+            widget.hide()
+            self.free.append(widget)
+
+    def release_all(self):
+        for page_id in list(self.active):
+            self.release(page_id)
+
+    def sync(self, wanted_ids):
+        """
+        Release every widget whose page is no longer wanted and return the ids
+        that still need a widget, preserving the caller's priority order.
+        """
+        wanted = set(wanted_ids)
+        for page_id in [p for p in self.active if p not in wanted]:
+            self.release(page_id)
+        return [p for p in wanted_ids if p not in self.active]
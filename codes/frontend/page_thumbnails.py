@@ -0,0 +1,118 @@
+# page_thumbnails.py
+
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QBrush, QColor, QFont, QPainter, QPen, QPixmap, QTextDocument
+
+THUMBNAIL_SCALE = 0.5  # Thumbnails are rendered at half the page's size.
+THUMBNAIL_BUDGET = 64 * 1024 * 1024  # Bytes of pixmaps kept before eviction.
+
+
+def css_pixels(value, default=0):
+    """Parse a CSS length like "7px" into a number."""
+    try:
+        return float(str(value).removesuffix("px"))
+    except ValueError:
+        return default
+
+
+class ThumbnailCache:
+    """
+    Raster snapshots of rendered pages for zoomed-out views.
+
+    Pixmaps are keyed by page id and content hash, kept in least-recently-used
+    order and evicted once they exceed a memory budget. Per-style brushes and
+    pens for the plain box rendering are shared here too.
+    """
+
+    def __init__(self, width, height, budget=THUMBNAIL_BUDGET):
+        self.width = width
+        self.height = height
+        self.budget = budget
+        self.pixmaps = OrderedDict()  # (page_id, hash) -> QPixmap.
+        self.used = 0
+        self.style_paint = {}  # Style -> (QBrush, QPen) for box rendering.
+
+    def __len__(self):
+        return len(self.pixmaps)
+
+    def clear(self):
+        self.pixmaps.clear()
+        self.used = 0
+
+    def cost(self, pixmap):
+        return pixmap.width() * pixmap.height() * 4
+
+    def get(self, page):
+        key = (page.page_id, page.hash)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, page, pixmap):
+        key = (page.page_id, page.hash)
+        old = self.pixmaps.pop(key, None)
+        if old is not None:
+            self.used -= self.cost(old)
+
+        self.pixmaps[key] = pixmap
+        self.used += self.cost(pixmap)
+        while self.used > self.budget and len(self.pixmaps) > 1:
+            _, evicted = self.pixmaps.popitem(last=False)
+            self.used -= self.cost(evicted)
+
+    def box_paint(self, style):
+        """Brush and pen approximating a page style as a plain box."""
+        paint = self.style_paint.get(style)
+        if paint is None:
+            fields = style.fields
+            pen = QPen(QColor(fields.get("border_color", "white")))
+            pen.setCosmetic(True)
+            paint = (QBrush(QColor(fields.get("background_color", "black"))), pen)
+            self.style_paint[style] = paint
+        return paint
+
+    def render(self, page):
+        """Snapshot a page's rendered HTML with its style and cache it."""
+        fields = page.style.fields
+        width = round(self.width * THUMBNAIL_SCALE)
+        height = round(self.height * THUMBNAIL_SCALE)
+
+        pixmap = QPixmap(width, height)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.scale(THUMBNAIL_SCALE, THUMBNAIL_SCALE)
+
+        brush, pen = self.box_paint(page.style)
+        border = css_pixels(fields.get("border_width"), 1)
+        radius = css_pixels(fields.get("border_radius"))
+        frame = QRectF(0, 0, self.width, self.height).adjusted(
+            border / 2, border / 2, -border / 2, -border / 2
+        )
+        outline = QPen(pen)
+        outline.setCosmetic(False)
+        outline.setWidthF(border)
+        painter.setPen(outline)
+        painter.setBrush(brush)
+        painter.drawRoundedRect(frame, radius, radius)
+
+        padding = css_pixels(fields.get("padding")) + border
+        document = QTextDocument()
+        font = QFont(fields.get("font_family", "Arial"))
+        font.setPixelSize(round(css_pixels(fields.get("font_size"), 14)))
+        document.setDefaultFont(font)
+        # Qt's rich text ignores colours set on body, so the rule targets all.
+        document.setDefaultStyleSheet(f"* {{ color: {fields.get('color', 'white')}; }}")
+        document.setHtml(page.html)
+        document.setTextWidth(self.width - 2 * padding)
+        painter.translate(padding, padding)
+        document.drawContents(
+            painter, QRectF(0, 0, self.width - 2 * padding, self.height - 2 * padding)
+        )
+        painter.end()
+
+        self.put(page, pixmap)
+        return pixmap
@@ -0,0 +1,142 @@
+# render_cache.py
+
+import json
+import os
+import pathlib
+import threading
+from collections import OrderedDict
+
+import markdown
+from instrumentation import tracer
+from manifest import content_hash
+
+CACHE_PATH = pathlib.Path("../../storage/cache/")
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def render_markdown(raw_content):
+    """Render stored page content to HTML."""
+    # If content is double-encoded JSON string (fsck_books.py normalizes that
+    # away, so plain Markdown skips the decode attempt)
+    if isinstance(raw_content, str) and raw_content.lstrip()[:1] == '"':
+        try:
+            decoded = json.loads(raw_content)
+        except json.JSONDecodeError:
+            decoded = None
+        if isinstance(decoded, str):
+            raw_content = decoded
+
+    with tracer.timer("markdown"):
+        return markdown.markdown(raw_content if isinstance(raw_content, str) else "")
+
+
+class RenderCache:
+    """
+    On-disk, per-book map from content hash to rendered HTML.
+
+    Entries are kept in least-recently-used order and evicted once the total
+    HTML size exceeds max_bytes, so reopening an unchanged book does no Markdown
+    work and only edited pages are rendered again. Safe to share between the
+    loader's worker threads; rendering itself happens outside the lock.
+
+    trim() only shrinks the entries in memory: save() then merges them into
+    the file instead of replacing it, and load() brings the rest back.
+    """
+
+    def __init__(self, book_name, max_bytes=MAX_CACHE_BYTES):
+        self.path = CACHE_PATH / book_name / "render.json"
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.dirty = False
+        self.partial = False  # Entries were trimmed that only the file still has.
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.load()
+
+    def read(self):
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}  # A missing or corrupt cache is simply rebuilt.
+
+    def load(self):
+        """Read the file's entries in, as older than those already in memory."""
+        stored = self.read()
+        with self.lock:
+            self.entries = self.merged(stored)
+            self.size = sum(len(html) for html in self.entries.values())
+            self.partial = False
+
+    def merged(self, stored):
+        """Stored entries with the in-memory ones on top, cut to max_bytes."""
+        entries = OrderedDict(
+            (key, html) for key, html in stored.items() if key not in self.entries
+        )
+        entries.update(self.entries)
+        size = sum(len(html) for html in entries.values())
+        while size > self.max_bytes and entries:
+            _, html = entries.popitem(last=False)
+            size -= len(html)
+        return entries
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        # Write next to the target and rename, so a crash never leaves a
+        # truncated cache behind.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        stored = self.read() if self.partial else {}
+        with self.lock:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(self.merged(stored), f)
+            self.dirty = False
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, key):
+        """HTML cached under a content hash, or None. Never renders."""
+        with self.lock:
+            html = self.entries.get(key)
+            if html is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return html
+
+    def get(self, raw_content):
+        """Return the HTML for raw_content, rendering it only on a cache miss."""
+        key = content_hash(raw_content)
+        with self.lock:
+            html = self.entries.get(key)
+            if html is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        html = render_markdown(raw_content)
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = html
+                self.size += len(html)
+                self.dirty = True
+                self.evict()
+        return html
+
+    def trim(self, max_bytes):
+        """Shrink the in-memory entries to max_bytes; the file keeps them all."""
+        self.save()
+        with self.lock:
+            while self.size > max_bytes and self.entries:
+                _, html = self.entries.popitem(last=False)
+                self.size -= len(html)
+                self.partial = True
+
+    def evict(self):
+        while self.size > self.max_bytes and self.entries:
+            _, html = self.entries.popitem(last=False)
+            self.size -= len(html)
+            self.dirty = True
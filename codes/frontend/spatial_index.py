@@ -0,0 +1,118 @@
+# spatial_index.py
+
+import math
+
+
+class SpatialIndex:
+    """
+    Uniform grid of buckets over page rectangles (scene coordinates).
+
+    Answers "which pages intersect this rectangle" and "which page is under this
+    point" by visiting only the buckets the query touches, and supports
+    incremental insert, move and remove as pages are created or dragged.
+    """
+
+    def __init__(self, cell_size=512):
+        self.cell_size = cell_size
+        self.cells = {}  # (cx, cy) -> set of item ids in that bucket.
+        self.rects = {}  # item id -> (left, top, right, bottom).
+        self.z = {}  # item id -> insertion counter; higher is drawn on top.
+        self.counter = 0
+
+    def __len__(self):
+        return len(self.rects)
+
+    def __contains__(self, item_id):
+        return item_id in self.rects
+
+    def clear(self):
+        self.cells.clear()
+        self.rects.clear()
+        self.z.clear()
+
+    def cell_range(self, left, top, right, bottom):
+        size = self.cell_size
+        return (
+            math.floor(left / size),
+            math.floor(top / size),
+            math.floor(right / size),
+            math.floor(bottom / size),
+        )
+
+    def insert(self, item_id, x, y, width, height):
+        """Add an item, or move it if it is already indexed."""
+        if item_id in self.rects:
+            self.remove(item_id)
+
+        rect = (x, y, x + width, y + height)
+        self.rects[item_id] = rect
+        self.counter += 1
+        self.z[item_id] = self.counter
+
+        cx0, cy0, cx1, cy1 = self.cell_range(*rect)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.cells.setdefault((cx, cy), set()).add(item_id)
+
+    move = insert
+
+    def remove(self, item_id):
+        rect = self.rects.pop(item_id, None)
+        if rect is None:
+            return
+        self.z.pop(item_id, None)
+
+        cx0, cy0, cx1, cy1 = self.cell_range(*rect)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket is not None:
+                    bucket.discard(item_id)
+                    if not bucket:
+                        del self.cells[(cx, cy)]
+
+    def rect(self, item_id):
+        return self.rects.get(item_id)
+
+    def query(self, left, top, right, bottom):
+        """Ids of every item whose rectangle intersects the given one."""
+        cx0, cy0, cx1, cy1 = self.cell_range(left, top, right, bottom)
+
+        # A zoomed-out query can span far more buckets than are occupied; walk
+        # whichever of the two sets is smaller.
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            buckets = (
+                bucket
+                for (cx, cy), bucket in self.cells.items()
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1
+            )
+        else:
+            buckets = (
+                self.cells[(cx, cy)]
+                for cx in range(cx0, cx1 + 1)
+                for cy in range(cy0, cy1 + 1)
+                if (cx, cy) in self.cells
+            )
+
+        found = set()
+        for bucket in buckets:
+            for item_id in bucket:
+                if item_id in found:
+                    continue
+                l, t, r, b = self.rects[item_id]
+                if l <= right and r >= left and t <= bottom and b >= top:
+                    found.add(item_id)
+        return found
+
+    def at(self, x, y):
+        """The topmost item containing the point, or None."""
+        bucket = self.cells.get(
+            (math.floor(x / self.cell_size), math.floor(y / self.cell_size)), ()
+        )
+        best = None
+        for item_id in bucket:
+            l, t, r, b = self.rects[item_id]
+            if l <= x <= r and t <= y <= b:
+                if best is None or self.z[item_id] > self.z[best]:
+                    best = item_id
+        return best
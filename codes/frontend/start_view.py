@@ -1,5 +1,6 @@
 import sys
 import pathlib
+import threading
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -7,17 +8,26 @@ from PyQt6.QtWidgets import (
     QLineEdit,
     QPushButton,
     QListWidget,
+    QListWidgetItem,
 )
-from PyQt6.QtCore import Qt
-from graph_view import (
-    MovableViewport,
-)  # Ensure graph_view.py is in the same directory or set up as module
+from PyQt6.QtCore import Qt, pyqtSignal
+
+# graph_view (with markdown and NumPy) and the search modules are imported
+# when first needed, so the start window shows up without loading them.
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent / "backend"))
+from book_catalog import BookCatalog
+from cache_manager import SEARCH_PAGE_BYTES
 
 sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent.parent))
 from version import VERSION
 
+PAGE_RESULTS = 10  # Page matches listed under the matching books.
+MIN_QUERY_LENGTH = 2  # Shorter queries only filter book names.
+
 
 class StartWindow(QMainWindow):
+    catalog_changed = pyqtSignal()  # Emitted by the background thread.
+
     def __init__(self):
         super().__init__()
 
@@ -51,21 +61,141 @@ class StartWindow(QMainWindow):
         self.dropdown_list.setVisible(False)
         self.dropdown_list.itemClicked.connect(self.select_folder)
 
+        # Books are listed from the saved catalog, which a background thread
+        # loads and then refreshes against the bag, so the window appears in
+        # the same time however many books there are.
         self.bag = pathlib.Path("../../storage/bag/")
-        self.all_folders = sorted([f.name for f in self.bag.iterdir() if f.is_dir()])
-        self.dropdown_list.addItems(self.all_folders)
+        self.catalog = BookCatalog(self.bag)
+        self.all_folders = []
+        self.catalog_changed.connect(self.update_folders)
+
+        # After that, page search indexes are loaded and brought up to date;
+        # books become searchable as they finish. Books open in a graph view
+        # are searched through the view's index instead. The navigator counts
+        # these indexes against its memory budget (see trim_caches()).
+        from navigator import get_navigator
+
+        self.views = get_navigator().views
+        self.search_indexes = {}
+        self.index_lock = threading.Lock()
+        self.stop_indexing = None  # Stop event of the current indexer run.
+        self.indexer = None
+        self.start_indexing()
 
         self.set_styles()
         self.adjust_layout()
         self.update_version_position()
 
     def open_graph_view(self):
-        book_name = self.search_bar.text().strip()
+        self.open_book(self.search_bar.text().strip())
+
+    def open_book(self, book_name, page_id=None):
         if book_name:
-            self.graph_view = MovableViewport(book_name)
-            self.graph_view.loadPages(book_name)
-            self.graph_view.show()
-            self.close()
+            # Indexing stops at its next check, in the background; the graph
+            # view loads its own book's index.
+            self.stop_indexing.set()
+            with self.index_lock:
+                self.search_indexes.pop(book_name, None)
+            from navigator import get_navigator
+
+            self.graph_view = get_navigator().open_book(book_name, page_id)
+
+    def showEvent(self, event):
+        # Back from a book: pick up new books and edits made there.
+        if self.stop_indexing.is_set() or not self.indexer.is_alive():
+            self.start_indexing()
+        super().showEvent(event)
+
+    def start_indexing(self):
+        """
+        Start a new indexer run with its own stop event. A previous run that
+        was told to stop may still be returning; the new one waits for it in
+        the background instead of the GUI thread.
+        """
+        previous = self.indexer
+        self.stop_indexing = threading.Event()
+        self.indexer = threading.Thread(
+            target=self.load_books, args=(self.stop_indexing, previous), daemon=True
+        )
+        self.indexer.start()
+
+    def load_books(self, stop, previous=None):
+        if previous is not None:
+            previous.join()
+        if self.catalog.load():
+            self.catalog_changed.emit()
+        try:
+            if self.catalog.refresh():
+                self.catalog_changed.emit()
+        except OSError:
+            pass  # No bag yet; the saved list is all there is.
+        self.index_books(stop)
+
+    def update_folders(self):
+        self.all_folders = self.catalog.names()
+        if self.dropdown_list.isVisible():
+            self.filter_folders()
+
+    def index_books(self, stop):
+        from book_store import open_book
+        from search_index import SearchIndex
+
+        for name in self.catalog.names():
+            if stop.is_set():
+                return
+            view = self.views.get(name)
+            if view is not None and view.search_index is not None:
+                continue  # Searched through the graph view's index.
+
+            index = SearchIndex(self.bag / name)
+            try:
+                book = open_book(self.bag / name)
+                index.update(book, stop)
+                book.close()
+            except (OSError, ValueError):
+                continue  # Unreadable books are just not searchable.
+            with self.index_lock:
+                if not stop.is_set():
+                    self.search_indexes[name] = index
+
+    def book_indexes(self):
+        """Search index per book: the graph views' where open, else this window's."""
+        with self.index_lock:
+            for name, view in self.views.items():
+                if view.search_index is not None:
+                    self.search_indexes.pop(name, None)  # Drop the second copy.
+            indexes = dict(self.search_indexes)
+        for name, view in self.views.items():
+            if view.search_index is not None:
+                indexes[name] = view.search_index
+        return indexes
+
+    def memory_usage(self):
+        """Bytes held by this window's search indexes (see CacheManager)."""
+        with self.index_lock:
+            pages = sum(len(index) for index in self.search_indexes.values())
+        return {"search": pages * SEARCH_PAGE_BYTES}
+
+    def trim_caches(self):
+        """Drop every search index; showEvent() loads them again."""
+        self.stop_indexing.set()
+        with self.index_lock:
+            trimmed = bool(self.search_indexes)
+            self.search_indexes = {}
+        return trimmed
+
+    def shrink_caches(self):
+        """Drop the largest search indexes, up to half of their memory."""
+        with self.index_lock:
+            by_size = sorted(
+                self.search_indexes.items(), key=lambda item: len(item[1]), reverse=True
+            )
+            excess = sum(len(index) for _, index in by_size) / 2
+            for name, index in by_size:
+                if excess <= 0:
+                    break
+                del self.search_indexes[name]
+                excess -= len(index)
 
     def show_dropdown(self, event):
         self.dropdown_list.setGeometry(
@@ -85,10 +215,29 @@ class StartWindow(QMainWindow):
     def filter_folders(self):
         search_text = self.search_bar.text().strip().lower()
         self.dropdown_list.clear()
-        matches = [f for f in self.all_folders if search_text in f.lower()]
-        self.dropdown_list.addItems(matches)
+        for name in self.all_folders:
+            if search_text in name.lower():
+                item = QListWidgetItem(name)
+                entry = self.catalog.get(name)
+                if entry is not None:
+                    item.setToolTip(f"{entry['pages']} pages")
+                self.dropdown_list.addItem(item)
+
+        indexes = self.book_indexes()
+        if len(search_text) >= MIN_QUERY_LENGTH and indexes:
+            from search_index import search_books
+
+            hits = search_books(indexes, search_text, PAGE_RESULTS)
+            for book_name, page_id, title, _ in hits:
+                item = QListWidgetItem(f"{book_name} › {title or page_id}")
+                item.setData(Qt.ItemDataRole.UserRole, (book_name, page_id))
+                self.dropdown_list.addItem(item)
 
     def select_folder(self, item):
+        page = item.data(Qt.ItemDataRole.UserRole)
+        if page is not None:
+            self.open_book(*page)
+            return
         self.search_bar.setText(item.text())
         self.dropdown_list.setVisible(False)
 
@@ -157,7 +306,8 @@ class StartWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    from navigator import get_navigator
+
     app = QApplication(sys.argv)
-    win = StartWindow()
-    win.show()
+    get_navigator().show_start()
     sys.exit(app.exec())
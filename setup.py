@@ -51,10 +51,10 @@ if not os.path.exists("venv"):
     progress_bar("Creating virtual environment      ", duration=2)
     run_command("python -m venv venv")
 
-# Install required dependencies inside the virtual environment (including Jinja2)
+# Install required dependencies inside the virtual environment
 run_command(
-    "venv/bin/python -m pip install --upgrade pip pyqt6 pyqtgraph markdown2 jinja2 || "
-    "venv\\Scripts\\python.exe -m pip install --upgrade pip pyqt6 pyqtgraph markdown2 jinja2"
+    "venv/bin/python -m pip install --upgrade pip pyqt6 pyqtgraph markdown numpy || "
+    "venv\\Scripts\\python.exe -m pip install --upgrade pip pyqt6 pyqtgraph markdown numpy"
 )
 
 # Display progress bar for dependency installation